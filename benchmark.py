@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from dpyobd import DpyOBD
+from dpyobdparser import DpyOBDParser
+from dpyothers import DpyOBData
+from dpytransport import DpyOBDEmulatorTransport
+
+# Runs against ELM327-emulator on a pty, results are written as JSON to compare releases #
+
+FAIRNESS_PID_COUNTS = [1, 2, 5, 10, 20, 30]
+
+def percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+def jain_fairness(counts):
+    # 1.0 when every pid got the same number of samples, 1/n when one pid got all of them
+    if not counts or not any(counts):
+        return 0.0
+    return sum(counts) ** 2 / (len(counts) * sum(count ** 2 for count in counts))
+
+async def open_connection(args):
+    conn = DpyOBD(suppress_logs=True, cache_path=None, protocol=args.protocol, transport=DpyOBDEmulatorTransport(scenario=args.scenario, delay=args.delay))
+    await conn.connect()
+    return conn
+
+def benchmarked_pids(conn, count):
+    pids = [pid for pid in DpyOBData.PIDS.keys() if int(pid.value, 16) % 0x20 != 0 and conn.is_pid_supported(pid)]
+    return pids[:count]
+
+# ============================== #
+async def bench_command_latency(args):
+    conn = await open_connection(args)
+    latencies = []
+    for _ in range(args.commands):
+        start = time.perf_counter()
+        await conn.send_command("010C")
+        latencies.append(time.perf_counter() - start)
+    await conn.close()
+    return {
+        "commands": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+    }
+
+async def watch_counts(conn, pids, duration):
+    counts = {pid: 0 for pid in pids}
+    async def callback(pid, value):
+        counts[pid] += 1
+    for pid in pids:
+        await conn.watch(pid, callback, rate=1000) # Ask for more than the link can give, so the link is saturated
+    await asyncio.sleep(duration)
+    await conn.unwatchall()
+    return counts
+
+async def bench_pid_throughput(args):
+    conn = await open_connection(args)
+    counts = await watch_counts(conn, benchmarked_pids(conn, args.pids), args.duration)
+    await conn.close()
+    return {
+        "duration_s": args.duration,
+        "samples_per_s": {pid.name: count / args.duration for pid, count in counts.items()},
+        "total_samples_per_s": sum(counts.values()) / args.duration,
+    }
+
+async def bench_scheduler_fairness(args):
+    conn = await open_connection(args)
+    results = []
+    for pid_count in FAIRNESS_PID_COUNTS:
+        pids = benchmarked_pids(conn, pid_count)
+        if len(pids) < pid_count:
+            break
+        counts = list((await watch_counts(conn, pids, args.duration)).values())
+        results.append({
+            "pids": pid_count,
+            "jain_fairness": jain_fairness(counts),
+            "min_samples_per_s": min(counts) / args.duration,
+            "max_samples_per_s": max(counts) / args.duration,
+            "total_samples_per_s": sum(counts) / args.duration,
+        })
+    await conn.close()
+    return results
+
+def bench_parser(args):
+    parser = DpyOBDParser()
+    responses = ["410C1AF8", "410D32", "410573", "410480", "4111FF", "411F0102", "410B65"] * (args.responses // 7)
+    pids = [DpyOBData.COMMANDS(response[2:4]) for response in responses]
+
+    start = time.perf_counter()
+    for pid, response in zip(pids, responses):
+        parser.general_parser_func(pid, response)
+    single_duration = time.perf_counter() - start
+
+    result = {"responses": len(responses), "single_responses_per_s": len(responses) / single_duration}
+    try:
+        start = time.perf_counter()
+        parser.batch_parser_func(responses)
+        result["batch_responses_per_s"] = len(responses) / (time.perf_counter() - start)
+    except Exception as e: # NumPy is optional
+        result["batch_responses_per_s"] = None
+        result["batch_error"] = str(e)
+    return result
+
+async def bench_time_to_first_sample(args):
+    first_sample = asyncio.get_running_loop().create_future()
+    async def callback(pid, value):
+        if not first_sample.done():
+            first_sample.set_result(time.perf_counter())
+
+    start = time.perf_counter()
+    conn = await open_connection(args)
+    connected = time.perf_counter()
+    await conn.watch(DpyOBData.COMMANDS.RPM, callback)
+    sampled = await asyncio.wait_for(first_sample, timeout=30)
+    await conn.close()
+    return {"connect_s": connected - start, "first_sample_s": sampled - start}
+# ============================== #
+
+async def main(args):
+    results = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "scenario": args.scenario,
+        "bus_delay_s": args.delay,
+        "command_latency": await bench_command_latency(args),
+        "pid_throughput": await bench_pid_throughput(args),
+        "scheduler_fairness": await bench_scheduler_fairness(args),
+        "parser": bench_parser(args),
+        "time_to_first_sample": await bench_time_to_first_sample(args),
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="DpyOBD benchmarks against ELM327-emulator")
+    argument_parser.add_argument("--delay", type=float, default=0.005, help="simulated bus delay of every ECU response in seconds")
+    argument_parser.add_argument("--scenario", default="car", help="ELM327-emulator scenario")
+    argument_parser.add_argument("--protocol", default="6", choices=DpyOBData.PROTOCOLS.keys())
+    argument_parser.add_argument("--duration", type=float, default=5.0, help="seconds of watching per throughput measurement")
+    argument_parser.add_argument("--commands", type=int, default=500, help="commands sent for the latency measurement")
+    argument_parser.add_argument("--pids", type=int, default=7, help="watched pids for the throughput measurement")
+    argument_parser.add_argument("--responses", type=int, default=700000, help="responses decoded for the parser measurement")
+    argument_parser.add_argument("--output", default="benchmark.json")
+    asyncio.run(main(argument_parser.parse_args()))
@@ -0,0 +1,102 @@
+import math
+from array import array
+from typing import Any, List, Optional
+from dpyothers import DpyOBData, DpyOBDAggregate
+
+class DpyOBDAggregator():
+    # Windows are built from step long buckets in fixed arrays, a sample updates one bucket in O(1)
+    def __init__(self, pid: DpyOBData.COMMANDS, window: float, step: Optional[float] = None) -> None:
+        step = window if step is None else step # Tumbling windows when there is no step
+        bucket_count = round(window / step) if window > 0 and step > 0 else 0
+        if bucket_count < 1 or not math.isclose(bucket_count * step, window):
+            raise ValueError("Window must be positive and a whole multiple of the step")
+        self.__pid = pid
+        self.__step = step
+        self.__bucket_count = bucket_count
+        self.__counts = array("q", [0] * bucket_count)
+        self.__sums = array("d", [0.0] * bucket_count)
+        self.__minimums = array("d", [0.0] * bucket_count)
+        self.__maximums = array("d", [0.0] * bucket_count)
+        self.__lasts = array("d", [0.0] * bucket_count)
+        self.__current = None # Index of the step that the newest sample fell into
+
+    def add(self, timestamp: float, value: Any) -> List[DpyOBDAggregate]:
+        # Returns the summaries of the windows that were closed by this sample
+        if isinstance(value, bool) or not isinstance(value, (int, float)): # Multi value pids and missing answers are not aggregated
+            return list()
+        index = math.floor(timestamp / self.__step)
+        summaries = list()
+        if self.__current is None:
+            self.__current = index
+        elif index > self.__current:
+            summaries = self.__close(index)
+        else:
+            index = self.__current # A clock stepping back must not reopen closed windows
+
+        slot = index % self.__bucket_count
+        if self.__counts[slot] == 0:
+            self.__sums[slot] = value
+            self.__minimums[slot] = value
+            self.__maximums[slot] = value
+        else:
+            self.__sums[slot] += value
+            if value < self.__minimums[slot]:
+                self.__minimums[slot] = value
+            if value > self.__maximums[slot]:
+                self.__maximums[slot] = value
+        self.__counts[slot] += 1
+        self.__lasts[slot] = value
+        return summaries
+
+    def flush(self) -> List[DpyOBDAggregate]:
+        # Summary of the window that is still open, for stopping without losing its samples
+        if self.__current is None:
+            return list()
+        summary = self.__summary(self.__current)
+        self.__current = None
+        for slot in range(self.__bucket_count):
+            self.__counts[slot] = 0
+        return [summary] if summary is not None else list()
+
+    def __close(self, index: int) -> List[DpyOBDAggregate]:
+        summaries = list()
+        # Every finished step ends a window, after bucket_count steps without samples there is nothing left to report
+        for closed in range(self.__current, min(index, self.__current + self.__bucket_count)):
+            summary = self.__summary(closed)
+            if summary is not None:
+                summaries.append(summary)
+            self.__counts[(closed + 1) % self.__bucket_count] = 0 # Oldest bucket leaves the window
+        self.__current = index
+        return summaries
+
+    def __summary(self, last_step: int) -> Optional[DpyOBDAggregate]:
+        count = 0
+        total = 0.0
+        minimum = math.inf
+        maximum = -math.inf
+        last = None
+        for step in range(last_step + 1 - self.__bucket_count, last_step + 1): # Oldest bucket first, so last is the newest value
+            slot = step % self.__bucket_count
+            if self.__counts[slot] == 0:
+                continue
+            count += self.__counts[slot]
+            total += self.__sums[slot]
+            minimum = min(minimum, self.__minimums[slot])
+            maximum = max(maximum, self.__maximums[slot])
+            last = self.__lasts[slot]
+        if count == 0:
+            return None
+        start = (last_step + 1 - self.__bucket_count) * self.__step
+        return DpyOBDAggregate(self.__pid, start, start + self.__bucket_count * self.__step, count, minimum, maximum, total / count, last)
+
+    @property
+    def pid(self) -> DpyOBData.COMMANDS:
+        return self.__pid
+
+    @property
+    def window(self) -> float:
+        return self.__bucket_count * self.__step
+
+    @property
+    def step(self) -> float:
+        return self.__step
@@ -0,0 +1,38 @@
+import json
+import os
+from typing import Any
+
+class DpyOBDCache():
+    def __init__(self, path: str) -> None:
+        self.__path = path
+        self.__data = None
+
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        return self.__load().get(section, dict()).get(key, default)
+
+    def set(self, section: str, key: str, value: Any) -> bool:
+        self.__data = None # Other instances may have written to the same file since it was loaded
+        data = self.__load()
+        data.setdefault(section, dict())[key] = value
+        try:
+            os.makedirs(os.path.dirname(self.__path) or ".", exist_ok=True)
+            temporary_path = f"{self.__path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(data, file)
+            os.replace(temporary_path, self.__path) # Never leave a half written cache behind
+            return True
+        except OSError:
+            return False
+
+    def __load(self) -> dict:
+        if self.__data is None:
+            try:
+                with open(self.__path) as file:
+                    self.__data = json.load(file)
+            except (OSError, ValueError):
+                self.__data = dict()
+        return self.__data
+
+    @property
+    def path(self) -> str:
+        return self.__path
@@ -0,0 +1,50 @@
+import asyncio
+from collections import deque
+from typing import Any, Callable, Optional
+
+class DpyOBDDelivery():
+    # Runs one consumer's callbacks in its own task, so the poll loop only queues and never waits for user code
+    DEFAULT_MAX_PENDING = 64
+
+    def __init__(self, handler: Callable[..., Any], max_pending: int = DEFAULT_MAX_PENDING, on_drop: Optional[Callable[[], None]] = None) -> None:
+        if max_pending <= 0:
+            raise ValueError("Pending callback count must be positive")
+        self.__handler = handler
+        self.__on_drop = on_drop
+        self.__queue = deque(maxlen=max_pending)
+        self.__task = None
+        self.__dropped = 0
+        self.__is_closed = False
+
+    def deliver(self, *args: Any) -> None:
+        if self.__is_closed:
+            return
+        if len(self.__queue) == self.__queue.maxlen: # A slow callback gets the newest values, the oldest are dropped
+            self.__dropped += 1
+            if self.__on_drop is not None:
+                self.__on_drop()
+        self.__queue.append(args)
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.get_running_loop().create_task(self.__run())
+
+    async def __run(self) -> None:
+        while self.__queue:
+            await self.__handler(*self.__queue.popleft()) # Handlers report their own errors
+
+    def close(self, drain: bool = False) -> None:
+        # A running callback is never cancelled, it may be the one that closes its delivery
+        self.__is_closed = True
+        if not drain:
+            self.__queue.clear()
+
+    @property
+    def pending(self) -> int:
+        return len(self.__queue)
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    @property
+    def is_closed(self) -> bool:
+        return self.__is_closed
@@ -0,0 +1,50 @@
+from typing import Any, Optional
+
+class DpyOBDFilter():
+    def __init__(self, on_change: bool = False, deadband: Optional[float] = None, deadband_percent: Optional[float] = None, max_silence: Optional[float] = None) -> None:
+        if (deadband is not None and deadband < 0) or (deadband_percent is not None and deadband_percent < 0) or (max_silence is not None and max_silence <= 0):
+            raise ValueError("Deadbands cannot be negative and max silence must be positive")
+        self.__on_change = on_change or deadband is not None or deadband_percent is not None
+        self.__deadband = deadband
+        self.__deadband_ratio = None if deadband_percent is None else deadband_percent / 100
+        self.__max_silence = max_silence
+        self.__last_response = None
+        self.__last_value = None
+        self.__last_delivery = None
+
+    def is_repeated(self, response: str, now: float) -> bool:
+        # Same bytes as the last delivered response, so it can be dropped before it is decoded
+        if self.__last_response is None or self.__is_silent_too_long(now):
+            return False
+        return self.__on_change and response == self.__last_response
+
+    def accept(self, response: str, value: Any, now: float) -> bool:
+        # Called for responses that are not repeated, deadbands are checked against the last delivered value
+        if self.__last_response is not None and not self.__is_silent_too_long(now) and self.__is_within_deadband(value):
+            return False
+        self.__last_response = response
+        self.__last_value = value
+        self.__last_delivery = now
+        return True
+
+    def __is_silent_too_long(self, now: float) -> bool:
+        return self.__max_silence is not None and now - self.__last_delivery >= self.__max_silence
+
+    def __is_within_deadband(self, value: Any) -> bool:
+        if self.__deadband is None and self.__deadband_ratio is None:
+            return False
+        if value is None or self.__last_value is None:
+            return value is self.__last_value
+        values = value if isinstance(value, tuple) else (value,)
+        last_values = self.__last_value if isinstance(self.__last_value, tuple) else (self.__last_value,)
+        for current, last in zip(values, last_values):
+            difference = abs(current - last)
+            if self.__deadband is not None and difference > self.__deadband:
+                return False
+            if self.__deadband_ratio is not None and difference > abs(last) * self.__deadband_ratio:
+                return False
+        return True
+
+    @property
+    def needs_value(self) -> bool:
+        return self.__deadband is not None or self.__deadband_ratio is not None
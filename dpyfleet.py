@@ -0,0 +1,277 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dpyobd import DpyOBD
+from dpyothers import DpyOBData, DpyOBDFleetSample, DpyOBDOverflow, DpyOBDStatus, WatchingError
+from dpystream import DpyOBDStream
+from dpytransport import DpyOBDTransport
+
+# ============================== # DpyOBDAdapterConfig # ============================== #
+
+class DpyOBDAdapterConfig(NamedTuple):
+    name: str
+    pids: Tuple[DpyOBData.COMMANDS, ...]
+    port: Optional[str] = None
+    baudrate: Optional[int] = None
+    protocol: str = "0"
+    transport: Optional[DpyOBDTransport] = None
+    rate: Optional[float] = None
+
+# ============================== # DpyOBDFleet # ============================== #
+
+class DpyOBDFleet():
+    MODULE_NAME = "DpyOBDFleet"
+    ADAPTER_STREAM_SIZE = 4096
+    LAG_PROBE_INTERVAL = 0.1
+    LAG_WARNING = 0.05 # Event loop lag in seconds that suggests spreading the adapters over processes
+    WORKER_BATCH_INTERVAL = 0.05 # Workers send their samples to the main process this often
+    WORKER_STOP_TIMEOUT = 10.0
+
+    def __init__(self, watching_interval: float = 1.0, processes: int = 1, reconnect_interval: float = 1.0, max_reconnect_interval: float = 30.0, suppress_logs: bool = False, cache_path: Optional[str] = DpyOBData.CACHE_PATH):
+        if watching_interval <= 0 or processes < 1 or reconnect_interval <= 0 or max_reconnect_interval < reconnect_interval:
+            raise Exception("Error accoured while crerating a DpyOBDFleet instance. Given arguments are incorrect")
+
+        self.__watching_interval = watching_interval
+        self.__processes = processes
+        self.__reconnect_interval = reconnect_interval
+        self.__max_reconnect_interval = max_reconnect_interval
+        self.__suppress_logs = suppress_logs
+        self.__cache_path = cache_path
+        self.__configs: Dict[str, DpyOBDAdapterConfig] = dict()
+        self.__connections: Dict[str, DpyOBD] = dict()
+        self.__statuses: Dict[str, DpyOBDStatus] = dict()
+        self.__streams: List[DpyOBDStream] = list()
+        self.__tasks: List[asyncio.Task] = list()
+        self.__workers: List[multiprocessing.Process] = list()
+        self.__worker_queue = None
+        self.__worker_stop = None
+        self.__loop_lag = 0.0
+        self.__is_lagging = False
+        self.__is_running = False
+
+    def add_adapter(self, name: str, pids: Iterable[DpyOBData.COMMANDS], port: str = None, baudrate: int = None, protocol: str = "0", transport: DpyOBDTransport = None, rate: float = None) -> None:
+        if self.__is_running:
+            raise WatchingError(self.__generate_log_string("Adapters cannot be added to a running fleet"))
+        if name in self.__configs:
+            raise WatchingError(self.__generate_log_string(f"There is already an adapter named {name}"))
+        if transport is None and (port is None or baudrate is None):
+            raise WatchingError(self.__generate_log_string(f"Adapter {name} needs a port and a baudrate or a transport, use detect_adapters to find them"))
+        self.__configs[name] = DpyOBDAdapterConfig(name, tuple(pids), port, baudrate, protocol, transport, rate)
+
+    async def detect_adapters(self, pids: Iterable[DpyOBData.COMMANDS], rate: float = None) -> List[str]:
+        # One detection pass over every port adds all adapters that are not in the fleet yet
+        detector = DpyOBD(suppress_logs=self.__suppress_logs, cache_path=None)
+        adapters = await asyncio.get_running_loop().run_in_executor(None, detector.detect_elms)
+        known_ports = {config.port for config in self.__configs.values()}
+        pids = tuple(pids)
+        names = list()
+        for port, baudrate in adapters:
+            if port in known_ports:
+                continue
+            self.add_adapter(port, pids, port=port, baudrate=baudrate, rate=rate)
+            names.append(port)
+        return names
+
+    async def start(self) -> None:
+        if self.__is_running:
+            self.__print("Already running")
+            return
+        self.__is_running = True
+        configs = list(self.__configs.values())
+        if self.__processes == 1:
+            self.__tasks = [asyncio.create_task(self.__supervise(config)) for config in configs]
+        else:
+            self.__start_workers(configs)
+        self.__tasks.append(asyncio.create_task(self.__monitor_loop_lag()))
+        self.__print(f"Started {len(configs)} adapters in {min(self.__processes, max(len(configs), 1))} processes")
+
+    async def stop(self) -> None:
+        if not self.__is_running:
+            return
+        self.__is_running = False
+        if self.__worker_stop is not None:
+            self.__worker_stop.set()
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = list()
+        await asyncio.gather(*(self.__close_quietly(conn) for conn in self.__connections.values()))
+        self.__connections = dict()
+        if self.__workers:
+            await asyncio.get_running_loop().run_in_executor(None, self.__join_workers)
+        for stream in list(self.__streams):
+            stream.close()
+        self.__print("Stopped all adapters")
+
+    def stream(self, max_size: int = 4096, overflow: DpyOBDOverflow = DpyOBDOverflow.DROP_OLDEST) -> DpyOBDStream:
+        # Samples of every adapter in one stream, each one tagged with the name of its adapter
+        if overflow == DpyOBDOverflow.BLOCK:
+            raise WatchingError(self.__generate_log_string("A fleet stream cannot hold back the pids of every adapter, drop samples instead"))
+        stream = DpyOBDStream(list(), max_size, overflow, on_close=self.__streams.remove)
+        self.__streams.append(stream)
+        return stream
+
+    def __publish(self, samples: Iterable[DpyOBDFleetSample]) -> None:
+        for sample in samples:
+            for stream in self.__streams:
+                stream.publish(sample)
+
+    # ============================== #
+    async def __supervise(self, config: DpyOBDAdapterConfig) -> None:
+        conn = DpyOBD(config.port, config.baudrate, suppress_logs=self.__suppress_logs, watching_interval=self.__watching_interval, protocol=config.protocol, cache_path=self.__cache_path, transport=config.transport)
+        self.__connections[config.name] = conn
+        delay = self.__reconnect_interval
+        while True:
+            try:
+                await conn.connect()
+                pids = self.__supported_pids(config, conn)
+                stream = conn.stream(pids, max_size=DpyOBDFleet.ADAPTER_STREAM_SIZE, rate=config.rate)
+                self.__statuses[config.name] = conn.connection_status
+                delay = self.__reconnect_interval
+                await self.__forward(config.name, conn, stream)
+                self.__print(f"Lost {config.name}, reconnecting")
+            except WatchingError as e: # The configuration is wrong for this vehicle, connecting again cannot help
+                self.__print(f"Stopped {config.name}: {e}")
+                self.__statuses[config.name] = DpyOBDStatus.NOT_CONNECTED
+                await self.__close_quietly(conn)
+                return
+            except Exception as e:
+                self.__print(f"Cannot connect {config.name}, retrying in {delay:g}s: {e}")
+            self.__statuses[config.name] = DpyOBDStatus.NOT_CONNECTED
+            await self.__close_quietly(conn)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.__max_reconnect_interval)
+
+    def __supported_pids(self, config: DpyOBDAdapterConfig, conn: DpyOBD) -> List[DpyOBData.COMMANDS]:
+        pids = [pid for pid in config.pids if conn.is_pid_supported(pid)]
+        unsupported = [pid for pid in config.pids if pid not in pids]
+        if unsupported:
+            self.__print(f"Leaving out the pids that {config.name} does not support: {', '.join(str(pid) for pid in unsupported)}")
+        if not pids:
+            raise WatchingError(self.__generate_log_string(f"{config.name} supports none of its pids"))
+        return pids
+
+    async def __forward(self, name: str, conn: DpyOBD, stream: DpyOBDStream) -> None:
+        # Returns when the adapter is lost for good, short drops are reconnected by DpyOBD itself
+        while conn.is_elm_connected or conn.is_reconnecting:
+            try:
+                samples = await asyncio.wait_for(stream.get_batch(), timeout=self.__reconnect_interval)
+            except asyncio.TimeoutError:
+                samples = list()
+            self.__statuses[name] = conn.connection_status
+            self.__publish(DpyOBDFleetSample(name, sample) for sample in samples)
+
+    async def __close_quietly(self, conn: DpyOBD) -> None:
+        try:
+            await conn.close()
+        except Exception:
+            pass # The adapter may already be gone
+
+    async def __monitor_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + DpyOBDFleet.LAG_PROBE_INTERVAL
+            await asyncio.sleep(DpyOBDFleet.LAG_PROBE_INTERVAL)
+            self.__loop_lag += 0.2 * (max(loop.time() - expected, 0.0) - self.__loop_lag)
+            is_lagging = self.__loop_lag > DpyOBDFleet.LAG_WARNING
+            if is_lagging and not self.__is_lagging:
+                self.__print(f"Event loop lags {self.__loop_lag * 1000:.0f}ms behind, consider spreading the adapters over more processes")
+            self.__is_lagging = is_lagging
+
+    # ============================== #
+    def __start_workers(self, configs: List[DpyOBDAdapterConfig]) -> None:
+        # Spawned instead of forked, a forked child would inherit the running event loop
+        context = multiprocessing.get_context("spawn")
+        self.__worker_queue = context.Queue()
+        self.__worker_stop = context.Event()
+        options = {
+            "watching_interval": self.__watching_interval,
+            "reconnect_interval": self.__reconnect_interval,
+            "max_reconnect_interval": self.__max_reconnect_interval,
+            "suppress_logs": self.__suppress_logs,
+            "cache_path": self.__cache_path,
+        }
+        groups = [configs[i::self.__processes] for i in range(self.__processes)]
+        for group in groups:
+            if not group:
+                continue
+            worker = context.Process(target=run_fleet_worker, args=(group, options, self.__worker_queue, self.__worker_stop), daemon=True)
+            worker.start()
+            self.__workers.append(worker)
+        self.__tasks.append(asyncio.create_task(self.__receive_from_workers()))
+
+    async def __receive_from_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.__get_worker_message)
+            if message is None:
+                continue
+            samples, statuses = message
+            self.__statuses.update(statuses)
+            self.__publish(samples)
+
+    def __get_worker_message(self) -> Optional[Tuple[List[DpyOBDFleetSample], Dict[str, DpyOBDStatus]]]:
+        try:
+            return self.__worker_queue.get(timeout=self.__reconnect_interval)
+        except queue.Empty:
+            return None
+
+    def __join_workers(self) -> None:
+        for worker in self.__workers:
+            worker.join(DpyOBDFleet.WORKER_STOP_TIMEOUT)
+            if worker.is_alive():
+                worker.terminate()
+        self.__workers = list()
+        self.__worker_queue = None
+        self.__worker_stop = None
+    # ============================== #
+
+    @property
+    def adapter_names(self) -> List[str]:
+        return list(self.__configs.keys())
+
+    @property
+    def connections(self) -> Dict[str, DpyOBD]:
+        # Only the adapters of this process, the ones in worker processes are reached through the stream
+        return dict(self.__connections)
+
+    @property
+    def statuses(self) -> Dict[str, DpyOBDStatus]:
+        return {name: self.__statuses.get(name, DpyOBDStatus.NOT_CONNECTED) for name in self.__configs.keys()}
+
+    @property
+    def loop_lag(self) -> float:
+        return self.__loop_lag
+
+    @property
+    def is_running(self) -> bool:
+        return self.__is_running
+
+    def __generate_log_string(self, log_string: str) -> str:
+        return f"[{DpyOBDFleet.MODULE_NAME}]: {log_string}"
+
+    def __print(self, output: str):
+        if not self.__suppress_logs:
+            print(self.__generate_log_string(output))
+
+# ============================== # Worker process # ============================== #
+
+def run_fleet_worker(configs: List[DpyOBDAdapterConfig], options: Dict[str, Any], worker_queue: Any, stop: Any) -> None:
+    # Entry point of a worker process, runs its share of the adapters as a fleet of its own
+    worker_queue.cancel_join_thread() # Samples still in the pipe are dropped at exit instead of hanging the worker
+    async def run() -> None:
+        fleet = DpyOBDFleet(**options)
+        for config in configs:
+            fleet.add_adapter(config.name, config.pids, config.port, config.baudrate, config.protocol, config.transport, config.rate)
+        stream = fleet.stream(max_size=DpyOBDFleet.ADAPTER_STREAM_SIZE * len(configs))
+        await fleet.start()
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            await asyncio.sleep(DpyOBDFleet.WORKER_BATCH_INTERVAL)
+            samples = await stream.get_batch() if len(stream) else list()
+            # A full pipe blocks the put, the poll loops of this worker keep running meanwhile
+            await loop.run_in_executor(None, worker_queue.put, (samples, fleet.statuses))
+        await fleet.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+
+class DpyOBDFrameParser():
+    # Headers on (ATH1) and spaces off, so every frame line starts with the header of the ECU that sent it
+    CAN_HEADER_LENGTHS = {"6": 3, "7": 8, "8": 3, "9": 8, "A": 8} # 11 bit ids are 3, 29 bit ids are 8 hex digits
+    LEGACY_HEADER_LENGTH = 6 # J1850 and ISO 9141/14230: priority, target and source bytes, followed by a checksum byte
+    LEGACY_CONTINUATION_LENGTHS = {"43": 1, "47": 1, "4A": 1, "49": 3} # Bytes that repeat on every following message of a legacy answer
+    AUTOMATIC_PROTOCOL = "0"
+    EXTENDED_CAN_PREFIX = "18DA" # Priority and format of the 29 bit diagnostic ids
+
+    def parse(self, protocol: str, response: str) -> Dict[str, str]:
+        # ECU address -> its answer in the same form as a headers off answer, e.g. {"7E8": "410C1AF8", "7E9": "410C1AF0"}
+        lines = [line.strip().replace(" ", "") for line in response.split("\r")]
+        lines = [line for line in lines if line and self.__is_hexadecimal(line)] # NO DATA, SEARCHING... and errors have no frames
+        if protocol in DpyOBDFrameParser.CAN_HEADER_LENGTHS:
+            return self.__parse_can(DpyOBDFrameParser.CAN_HEADER_LENGTHS[protocol], lines)
+        if protocol == DpyOBDFrameParser.AUTOMATIC_PROTOCOL and lines: # Protocol is not known before the search, the frames tell it
+            header_length = self.__detect_can_header_length(lines)
+            if header_length is not None:
+                return self.__parse_can(header_length, lines)
+        return self.__parse_legacy(lines)
+
+    def primary_response(self, ecu_responses: Dict[str, str]) -> Optional[str]:
+        # Lowest answering address is the engine ECU on every OBD-II protocol, negative answers come last
+        if not ecu_responses:
+            return None
+        address = min(ecu_responses, key=lambda address: (ecu_responses[address][:2] == "7F", address))
+        return ecu_responses[address]
+
+    def __detect_can_header_length(self, lines: List[str]) -> Optional[int]:
+        # 11 bit ids have 3 hex digits, so only their lines have an odd length, legacy lines are whole bytes
+        if all(len(line) % 2 == 1 for line in lines):
+            return 3
+        if all(line.startswith(DpyOBDFrameParser.EXTENDED_CAN_PREFIX) for line in lines):
+            return 8
+        return None
+
+    def __parse_can(self, header_length: int, lines: List[str]) -> Dict[str, str]:
+        responses = dict()
+        messages: Dict[str, Tuple[int, int, str]] = dict() # address -> (byte count, next sequence number, data so far)
+        for line in lines:
+            if len(line) < header_length + 2:
+                continue
+            header = line[:header_length]
+            address = header if header_length == 3 else header[-2:] # 29 bit ids end with the source address
+            frame = line[header_length:]
+            frame_type = frame[0]
+            if frame_type == "0": # Single frame
+                length = int(frame[1], 16)
+                if len(frame) >= 2 + length * 2:
+                    responses[address] = frame[2:2 + length * 2]
+            elif frame_type == "1": # First frame, 12 bit byte count
+                if len(frame) >= 4:
+                    messages[address] = (int(frame[1:4], 16), 1, frame[4:])
+            elif frame_type == "2": # Consecutive frame, 4 bit sequence number that wraps
+                if address not in messages:
+                    continue
+                byte_count, sequence, data = messages[address]
+                if int(frame[1], 16) != sequence:
+                    del messages[address] # A lost frame, the message cannot be put together anymore
+                    continue
+                data += frame[2:]
+                if len(data) >= byte_count * 2:
+                    responses[address] = data[:byte_count * 2]
+                    del messages[address]
+                else:
+                    messages[address] = (byte_count, (sequence + 1) % 16, data)
+            # Flow control frames ("3") are sent by the adapter, they carry no data
+        return responses
+
+    def __parse_legacy(self, lines: List[str]) -> Dict[str, str]:
+        responses = dict()
+        for line in lines:
+            if len(line) < DpyOBDFrameParser.LEGACY_HEADER_LENGTH + 4:
+                continue
+            address = line[4:6]
+            data = line[DpyOBDFrameParser.LEGACY_HEADER_LENGTH:-2]
+            continuation_length = DpyOBDFrameParser.LEGACY_CONTINUATION_LENGTHS.get(data[:2])
+            if address in responses and continuation_length is not None and responses[address][:2] == data[:2]:
+                responses[address] += data[continuation_length * 2:] # Code lists and VINs are split over several messages
+            else:
+                responses[address] = data
+        return responses
+
+    def __is_hexadecimal(self, text: str) -> bool:
+        try:
+            bytes.fromhex(text if len(text) % 2 == 0 else "0" + text)
+            return True
+        except ValueError:
+            return False
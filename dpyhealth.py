@@ -0,0 +1,58 @@
+from typing import Optional
+from dpyothers import DpyOBData, DpyOBDStatus
+
+class DpyOBDHealth():
+    TIMEOUT_LIMIT = 3 # Consecutive unanswered commands until the adapter is considered lost
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.__last_answer = None # Last time the adapter answered anything
+        self.__last_vehicle_request = None
+        self.__last_vehicle_answer = None
+        self.__consecutive_timeouts = 0
+        self.__voltage = None
+
+    def record_response(self, command: str, response: str, now: float) -> None:
+        self.__last_answer = now
+        self.__consecutive_timeouts = 0
+        if command[:2] == "AT":
+            if command == "ATRV" and response[-1:] == "V":
+                try:
+                    self.__voltage = float(response[:-1])
+                except ValueError:
+                    pass
+            return
+
+        self.__last_vehicle_request = now
+        if response[:1] == "4": # Positive answer of any mode
+            self.__last_vehicle_answer = now
+        elif any(response.startswith(message) for message in DpyOBData.ELM_BUS_ERROR_MESSAGES):
+            self.__last_vehicle_answer = None
+        # NO DATA only tells that nobody answered this request, the vehicle may still be there
+
+    def record_timeout(self, command: str, now: float) -> None:
+        self.__consecutive_timeouts += 1
+        if command[:2] != "AT":
+            self.__last_vehicle_request = now
+
+    def is_idle(self, now: float, idle_time: float) -> bool:
+        return self.__last_vehicle_request is None or now - self.__last_vehicle_request >= idle_time
+
+    def status(self, now: float, freshness: float) -> DpyOBDStatus:
+        if self.is_lost or self.__last_answer is None:
+            return DpyOBDStatus.NOT_CONNECTED
+        if self.__last_vehicle_answer is not None and now - self.__last_vehicle_answer <= freshness:
+            return DpyOBDStatus.CAR_CONNECTED
+        if self.__voltage is not None and self.__voltage >= 1:
+            return DpyOBDStatus.OBD_CONNECTED
+        return DpyOBDStatus.ELM_CONNECTED
+
+    @property
+    def voltage(self) -> Optional[float]:
+        return self.__voltage
+
+    @property
+    def is_lost(self) -> bool:
+        return self.__consecutive_timeouts >= DpyOBDHealth.TIMEOUT_LIMIT
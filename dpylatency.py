@@ -0,0 +1,63 @@
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+class DpyOBDLatencyTuner():
+    DEFAULT_TIMEOUT = 0x32 # ATST of a reset ELM327, in 4.096 ms units
+    MINIMUM_TIMEOUT = 0x05
+    TIMEOUT_UNIT = 0.004096
+    TIMEOUT_MARGIN = 2.0 # ATST is kept this many times above the slowest recent answer
+    RESPONSE_TIME_WINDOW = 32 # Answers between two ATST adjustments
+    MAX_RESPONSE_COUNTS = 256 # Learned request strings, pid groups change rarely once the rates are settled
+
+    def __init__(self) -> None:
+        self.__response_counts: Dict[str, Tuple[int, int]] = dict() # request -> (answering messages, length of the joined answer)
+        self.__response_times = deque(maxlen=DpyOBDLatencyTuner.RESPONSE_TIME_WINDOW)
+        self.__timeout = DpyOBDLatencyTuner.DEFAULT_TIMEOUT
+        self.__margin = DpyOBDLatencyTuner.TIMEOUT_MARGIN
+
+    def response_count(self, command: str) -> Optional[int]:
+        learned = self.__response_counts.get(command)
+        return None if learned is None else learned[0]
+
+    def is_complete(self, command: str, response: str) -> bool:
+        # A hinted answer shorter than the learned one lost an ECU or got cut
+        learned = self.__response_counts.get(command)
+        return learned is None or (response[:1] == "4" and len(response) >= learned[1])
+
+    def learn_response_count(self, command: str, count: int, response: str) -> None:
+        if count < 1 or count > 9: # Nobody answered, or more ECUs than a hint digit can tell
+            self.__response_counts.pop(command, None)
+            return
+        if len(self.__response_counts) >= DpyOBDLatencyTuner.MAX_RESPONSE_COUNTS and command not in self.__response_counts:
+            self.__response_counts.clear()
+        self.__response_counts[command] = (count, len(response))
+
+    def forget_response_count(self, command: str) -> None:
+        self.__response_counts.pop(command, None)
+
+    def record_response_time(self, duration: float) -> Optional[int]:
+        # Returns a new ATST value once enough answers were measured and the value should change
+        self.__response_times.append(duration)
+        if len(self.__response_times) < DpyOBDLatencyTuner.RESPONSE_TIME_WINDOW:
+            return None
+        timeout = math.ceil(max(self.__response_times) * self.__margin / DpyOBDLatencyTuner.TIMEOUT_UNIT)
+        timeout = min(max(timeout, DpyOBDLatencyTuner.MINIMUM_TIMEOUT), 0xFF)
+        self.__response_times.clear()
+        if self.__timeout - 1 <= timeout <= self.__timeout: # Not worth a command for one unit less
+            return None
+        self.__timeout = timeout
+        return timeout
+
+    def record_missing_answer(self) -> Optional[int]:
+        # A known answer did not come, ATST may have been too short, so it goes back to the default with a wider margin
+        self.__response_times.clear()
+        if self.__timeout >= DpyOBDLatencyTuner.DEFAULT_TIMEOUT:
+            return None
+        self.__margin = min(self.__margin * 2, 16.0)
+        self.__timeout = DpyOBDLatencyTuner.DEFAULT_TIMEOUT
+        return self.__timeout
+
+    @property
+    def timeout(self) -> int:
+        return self.__timeout
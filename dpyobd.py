@@ -1,48 +1,122 @@
 import serial
 from serial.tools import list_ports
-import serial_asyncio
 import asyncio
-from typing import Callable, Optional, Any, Tuple
-from dpyothers import CommandError, ConnectionError, DpyOBData, DpyOBDStatus, OBDNotFoundError
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, Any, Tuple, List, Dict, FrozenSet, Iterable
+from dpyothers import CommandError, ConnectionError, DpyOBData, DpyOBDDtcChange, DpyOBDOverflow, DpyOBDSample, DpyOBDStatus, OBDNotFoundError, ParserError, WatchingError
 from dpyobdparser import DpyOBDParser
+from dpycache import DpyOBDCache
+from dpyscheduler import DpyOBDScheduler
+from dpyhealth import DpyOBDHealth
+from dpyrecorder import DpyOBDRecorder
+from dpystats import DpyOBDStats
+from dpystream import DpyOBDStream
+from dpyfilter import DpyOBDFilter
+from dpyaggregator import DpyOBDAggregator
+from dpydelivery import DpyOBDDelivery
+from dpylatency import DpyOBDLatencyTuner
+from dpyframes import DpyOBDFrameParser
+from dpyshm import DpyOBDSampleBus
+from dpytransport import DpyOBDTransport, DpyOBDSerialTransport
 
 class DpyOBD:
     MODULE_NAME = "DpyOBD"
+    ELM_PROMPT = b">"
+    READ_CHUNK_SIZE = 1024
+    STALE_RESPONSE_TIMEOUT = 0.5
+    DETECTION_TIMEOUT = 1.0
+    HEALTH_FRESHNESS = 2 # A vehicle answer is trusted for this many watching intervals
+    BUILT_IN_WATCHER_PRIORITY = -1 # User watchers go first when the link is overloaded
+    DTC_WATCHER_PRIORITY = -2
+    DTC_REFRESH_INTERVAL = 60.0 # Pending codes do not change the monitor status, so code lists are also re-read this often
+    SETUP_COMMANDS = ["ATE0", "ATL0", "ATH0", "ATS0"] # Close echo, line-spacing, headers and spaces
+    RECONNECT_INTERVAL = 0.5
+    MAX_RECONNECT_INTERVAL = 30.0
+    RECONNECT_PROBE_TIMEOUT = 1.0
+    PROTOCOL_SEARCH_TIMEOUT = 10.0 # First OBD request after ATSP0 waits for the adapter to try the protocols one by one
+    MULTI_PID_FAILURE_LIMIT = 3 # Rejected multi pid requests in a row before pids are requested one by one
+    WATCH_CONSUMER = "watch" # A pid has at most one watch callback, streams and aggregators are their own consumers
+    DISCOVERY_ATTEMPTS = 2 # Requests of a supported pids range before it is given up
 
-    def __init__(self, port: str = None, baudrate: int = None, suppress_logs: bool = False, watching_interval: float = 1.0, protocol: str = "0"):
+    def __init__(self, port: str = None, baudrate: int = None, suppress_logs: bool = False, watching_interval: float = 1.0, protocol: str = "0", cache_path: Optional[str] = DpyOBData.CACHE_PATH, transport: DpyOBDTransport = None, collect_stats: bool = False, auto_reconnect: bool = True, latency_mode: bool = False, headers_mode: bool = False):
         if watching_interval <= 0 or not (protocol in DpyOBData.PROTOCOLS.keys()):
             raise Exception("Error accoured while crerating a DpyOBD instance. Given arguments are incorrect")
         
         self.__port = port
         self.__baudrate = baudrate
+        self.__transport = transport
         self.__reader = None
         self.__writer = None
+        self.__read_buffer = bytearray()
+        self.__awaiting_prompt = False
+        self.__auto_reconnect = auto_reconnect
+        self.__latency_tuner = DpyOBDLatencyTuner() if latency_mode else None
+        self.__last_response_count = 0 # Messages in the last raw response, only counted in latency mode
+        self.__frame_parser = DpyOBDFrameParser() if headers_mode else None # Headers on, answers are grouped by ECU
+        self.__is_link_broken = False # Reading or writing failed, the transport has to be opened again
+        self.__is_reconnecting = False
         self.__protocol = protocol
         self.__parser = DpyOBDParser()
+        self.__health = DpyOBDHealth()
+        self.__recorder = None
+        self.__sample_bus = None
+        self.__stats = DpyOBDStats() if collect_stats else None # None keeps the hot path free of measurements
+        self.__cache = DpyOBDCache(cache_path) if cache_path else None
         self.__watching = dict()
+        self.__latest_responses: Dict[DpyOBData.COMMANDS, Tuple[float, str]] = dict() # pid -> (loop time, last answer)
+        self.__pending_queries: Dict[DpyOBData.COMMANDS, asyncio.Future] = dict()
+        self.__streams: List[DpyOBDStream] = list()
+        self.__aggregators: Dict[DpyOBData.COMMANDS, List[Tuple[DpyOBDAggregator, DpyOBDDelivery]]] = dict()
+        self.__scheduler = DpyOBDScheduler()
+        self.__pid_consumers: Dict[DpyOBData.COMMANDS, Dict[Any, Tuple[float, int]]] = dict() # pid -> consumer -> (rate, priority)
+        self.__dispatch_task = None
+        self.__dispatch_wakeup = asyncio.Event()
+        self.__is_scheduler_overloaded = False
+        self.__is_multi_pid_supported = True
+        self.__multi_pid_failures = 0
+        self.__is_protocol_searched = protocol == "0" # ATDPN only tells the found protocol after the first OBD request
         self.__suppress_logs = suppress_logs
         self.__watching_interval = watching_interval
         self.__command_lock = asyncio.Lock()
-        self.__built_in_watching = dict()
+        self.__built_in_watching = set()
         self.__built_in_watcher_static_record = {
-            "status": (self.__built_in_status_watcher_func, self.__built_in_status_callback_func),
-            "elm_voltage": (self.__built_in_elm_voltage_watcher_func, self.__built_in_elm_voltage_callback_func),
-            "dtc": (self.__built_in_dtc_watcher_func, self.__built_in_dtc_callback_func),
+            "status": (self.__built_in_status_watcher_func, self.__built_in_status_callback_func, DpyOBD.BUILT_IN_WATCHER_PRIORITY),
+            "elm_voltage": (self.__built_in_elm_voltage_watcher_func, self.__built_in_elm_voltage_callback_func, DpyOBD.BUILT_IN_WATCHER_PRIORITY),
+            "dtc": (self.__built_in_dtc_watcher_func, self.__built_in_dtc_callback_func, DpyOBD.DTC_WATCHER_PRIORITY),
         }
+        self.__dtc_delivery = None
         # fields #
         self.__connection_status = DpyOBDStatus.NOT_CONNECTED
         self.__elm_voltage = 0
+        self.__vin = None
+        self.__supported_pids = None
+        self.__dtcs = {mode: frozenset() for mode in DpyOBData.DTC_MODES.keys()}
+        self.__dtc_status = None # (MIL is on, stored code count) of the last code read
+        self.__dtc_read_time = None
 
     async def connect(self) -> bool:
         if self.is_elm_connected:
-            self.__print(self.__generate_log_string(f"Already connected to {self.__port} with {self.__baudrate} baudrate"))
+            self.__print(self.__generate_log_string(f"Already connected to {self.__transport.name}"))
             return True
         
-        if self.__baudrate == None or self.__port == None:
-            self.__port, self.__baudrate = self.detect_elm()
+        if self.__transport is None:
+            if self.__baudrate == None or self.__port == None:
+                # Detection blocks on serial reads, so it runs in a worker thread instead of the event loop
+                self.__port, self.__baudrate = await asyncio.get_running_loop().run_in_executor(None, self.detect_elm)
+            self.__transport = DpyOBDSerialTransport(self.__port, self.__baudrate)
 
         try:
-            self.__reader, self.__writer = await serial_asyncio.open_serial_connection(url=self.__port, baudrate=self.__baudrate)
+            self.__reader, self.__writer = await self.__transport.open()
+            self.__read_buffer.clear()
+            self.__awaiting_prompt = False
+            self.__is_link_broken = False
+            self.__is_multi_pid_supported = True
+            self.__multi_pid_failures = 0
+            self.__health.reset()
+            self.__dtc_status = None
+            self.__latest_responses.clear()
         except Exception as e:
             self.__connection_status = DpyOBDStatus.NOT_CONNECTED
             raise ConnectionError(self.__generate_log_string(f"Error accoured while trying to connect: {e}"))
@@ -50,21 +124,29 @@ class DpyOBD:
         try:
             await self.send_command("ATZ", force=True)  # Reset
             self.__connection_status = DpyOBDStatus.ELM_CONNECTED # If there is no Exception accoured during ATZ, then ELM is connected (prevent to use force send_command)
-            await self.send_command("ATE0")  # Close echo
-            await self.send_command("ATL0")  # Close line-spacing
-            await self.send_command("ATH0")  # Close headers
-            await self.send_command("ATS0")  # Close spaces
+            for command in self.__setup_commands():
+                await self.send_command(command)
             await self.change_protocol(self.__protocol)
+            if self.__latency_tuner is not None:
+                self.__latency_tuner = DpyOBDLatencyTuner()
+                async with self.__command_lock:
+                    await self.__enable_adaptive_timing()
         except Exception as e:
             self.__connection_status = DpyOBDStatus.NOT_CONNECTED
+            try:
+                await self.__release_link() # Otherwise every retry would leave another open link behind
+            except Exception:
+                pass
             raise ConnectionError(self.__generate_log_string(f"Error accoured while initializing ELM: {e}"))
+
+        await self.__discover_supported_pids()
         
         # Initialize all built-in watchers
         await self.__built_in_watchall()
         
         return True
 
-    def detect_elm(self) -> Tuple[str, int]:
+    def __detection_candidates(self) -> Tuple[List[str], List[int]]:
         ports = self.__port
         baudrates = self.__baudrate
         if not ports:
@@ -75,108 +157,711 @@ class DpyOBD:
             baudrates = DpyOBData.MOST_USED_BAUDRATES
         else:
             baudrates = [baudrates]
+        return ports, baudrates
+
+    def detect_elm(self) -> Tuple[str, int]:
+        ports, baudrates = self.__detection_candidates()
 
         self.__print("Starting to detect ELM...")
-        trial_count = 0
-        total_trial_domain = len(ports) * len(baudrates)
-        for port in ports:
-            for baudrate in baudrates:
-                self.__print_progress_bar(trial_count, total_trial_domain)
-                try:
-                    with serial.Serial(port, baudrate, timeout=1) as ser:
-                        ser.write("ATZ\r".encode())
-                        ser.flush()
-                        response = ser.read_until("\r").decode()
-                        if not response == '?':
-                            self.__print_progress_bar(total_trial_domain, total_trial_domain)
-                            self.__print(f"ELM found on port: {port} with {baudrate} baudrate")
-                            return port, baudrate
-                        trial_count += 1
-                except: 
-                    trial_count += 1
-                    continue
+        # Try the adapter of the last run first, a normal restart finds it in one probe
+        last_adapter = self.__cache.get("adapter", "last") if self.__cache is not None else None
+        if last_adapter is not None and last_adapter[0] in ports and last_adapter[1] in baudrates:
+            if self.__probe_elm(*last_adapter):
+                return self.__elm_found(*last_adapter)
+
+        # Each port is probed in its own thread, baudrates of a port are tried one after another
+        found = threading.Event()
+        progress = [0, len(ports) * len(baudrates), threading.Lock()]
+        executor = ThreadPoolExecutor(max_workers=max(len(ports), 1))
+        try:
+            futures = [executor.submit(self.__probe_port, port, baudrates, found, progress) for port in ports]
+            for future in as_completed(futures):
+                result = future.result()
+                if result is not None:
+                    found.set()
+                    return self.__elm_found(*result)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
         raise OBDNotFoundError("OBD device not found on any port or baudrate")
 
+    def detect_elms(self) -> List[Tuple[str, int]]:
+        # Probes every port to the end instead of stopping at the first adapter, for running several of them
+        ports, baudrates = self.__detection_candidates()
+
+        self.__print("Starting to detect all ELMs...")
+        not_found = threading.Event() # Never set, so no port gives up early
+        progress = [0, len(ports) * len(baudrates), threading.Lock()]
+        with ThreadPoolExecutor(max_workers=max(len(ports), 1)) as executor:
+            results = list(executor.map(lambda port: self.__probe_port(port, baudrates, not_found, progress), ports))
+        adapters = [result for result in results if result is not None]
+        for port, baudrate in adapters:
+            self.__print(f"ELM found on port: {port} with {baudrate} baudrate")
+        return adapters
+
+    def __probe_port(self, port: str, baudrates: List[int], found: threading.Event, progress: List[Any]) -> Optional[Tuple[str, int]]:
+        for baudrate in baudrates:
+            if found.is_set():
+                return None
+            is_elm = self.__probe_elm(port, baudrate)
+            with progress[2]:
+                progress[0] += 1
+                self.__print_progress_bar(progress[0], progress[1])
+            if is_elm:
+                return port, baudrate
+        return None
+
+    def __probe_elm(self, port: str, baudrate: int) -> bool:
+        try:
+            with serial.Serial(port, baudrate, timeout=DpyOBD.DETECTION_TIMEOUT) as ser:
+                ser.reset_input_buffer()
+                ser.write("ATI\r".encode()) # Unlike ATZ, ATI answers immediately without resetting the adapter
+                ser.flush()
+                response = ser.read_until(DpyOBD.ELM_PROMPT).decode(errors="ignore")
+                return "ELM" in response
+        except Exception:
+            return False
+
+    def __elm_found(self, port: str, baudrate: int) -> Tuple[str, int]:
+        self.__print(f"ELM found on port: {port} with {baudrate} baudrate")
+        if self.__cache is not None:
+            self.__cache.set("adapter", "last", [port, baudrate])
+        return port, baudrate
+
+    async def __discover_supported_pids(self) -> None:
+        # Each ECU answers with its own bitmap, a vehicle supports what any of them supports
+        try:
+            supported_pids = self.__parser.supported_pids_parser_func(0x00, await self.__send_to_all_ecus("0100", DpyOBD.PROTOCOL_SEARCH_TIMEOUT))
+        except Exception as e:
+            supported_pids = None
+            self.__print(f"Supported pids cannot be discovered: {e}")
+        if self.__is_protocol_searched: # Multi pid grouping and frame parsing depend on the found protocol
+            await self.__read_protocol_number()
+            self.__is_protocol_searched = self.__protocol == "0" # Nothing answered, the adapter searches again on the next request
+            if not self.__is_protocol_searched:
+                self.__print(f"Protocol found: {self.protocol_number}-{self.protocol_name}")
+
+        try:
+            self.__vin = self.__parser.vin_parser_func(await self.send_command("0902"))
+        except Exception:
+            self.__vin = None
+
+        if supported_pids is None: # Vehicle does not answer at all, so nothing can be said about its pids
+            self.__supported_pids = None
+            return
+        if self.__vin is not None and self.__cache is not None:
+            cached_pids = self.__cache.get("supported_pids", self.__vin)
+            if cached_pids is not None:
+                self.__supported_pids = frozenset(cached_pids)
+                self.__print(f"Supported pids of {self.__vin} are loaded from the cache")
+                return
+
+        is_complete = True
+        base_pid = 0x00
+        while True:
+            base_pid += 0x20
+            if base_pid > 0xE0 or f"{base_pid:02X}" not in supported_pids:
+                break
+            try:
+                supported_pids |= await self.__discover_pid_range(base_pid)
+            except Exception as e:
+                # A bus error must not make the pids above it unsupported, they stay unrestricted until the next connect
+                is_complete = False
+                supported_pids |= {f"{pid:02X}" for pid in range(base_pid + 1, 0x100)}
+                self.__print(f"Supported pids above {base_pid:02X} cannot be discovered, they are not restricted: {e}")
+                break
+
+        self.__supported_pids = frozenset(supported_pids)
+        if is_complete and self.__vin is not None and self.__cache is not None:
+            self.__cache.set("supported_pids", self.__vin, sorted(supported_pids))
+
+    async def __discover_pid_range(self, base_pid: int) -> set:
+        for attempt in range(DpyOBD.DISCOVERY_ATTEMPTS):
+            try:
+                return self.__parser.supported_pids_parser_func(base_pid, await self.__send_to_all_ecus(f"01{base_pid:02X}"))
+            except Exception:
+                if attempt == DpyOBD.DISCOVERY_ATTEMPTS - 1:
+                    raise
+
     async def close(self) -> bool:
-        if not self.is_elm_connected:
+        if not self.is_elm_connected and not self.__is_reconnecting and self.__writer is None:
             self.__print("Already closed")
             return True
         
         try:
             await self.unwatchall()         
+            for stream in list(self.__streams):
+                stream.close()
+            for aggregator, _ in [entry for entries in self.__aggregators.values() for entry in entries]:
+                await self.unaggregate(aggregator)
             await self.__built_in_unwatchall()   
-            self.__writer.close()
-            await self.__writer.wait_closed()
+            await self.__stop_dispatching()
+            if self.__recorder is not None:
+                self.stop_recording()
+            if self.__sample_bus is not None:
+                self.stop_sharing()
+            await self.__release_link()
             self.__connection_status = DpyOBDStatus.NOT_CONNECTED
             return True
         except Exception as e:
             raise ConnectionError(self.__generate_log_string(f"Error occurred while closing the connection: {e}"))
 
+    async def __release_link(self) -> None:
+        writer, self.__reader, self.__writer = self.__writer, None, None
+        if writer is not None:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass # The device may already be gone, the transport is closed anyway
+        await self.__transport.close()
+
+    def __setup_commands(self) -> List[str]:
+        if self.__frame_parser is None:
+            return DpyOBD.SETUP_COMMANDS
+        return DpyOBD.SETUP_COMMANDS + ["ATH1"] # Spaces stay off, frame lines are told apart by their headers
+
     async def send_command(self, command: str, timeout: float = 3.0, force: bool =False) -> str:
+        # In headers mode this is the answer of the engine ECU, send_ecu_command gives the answers of all ECUs
+        return await self.__send(command, timeout, force, False)
+
+    async def send_ecu_command(self, command: str, timeout: float = 3.0, force: bool = False) -> Dict[str, str]:
+        # ECU address -> answer, multi frame answers are put together, needs headers_mode
+        if self.__frame_parser is None:
+            raise CommandError(self.__generate_log_string("Answers can only be grouped by ECU in headers mode"))
+        return self.__frame_parser.parse(self.__protocol, await self.__send(command, timeout, force, True))
+
+    async def __send_to_all_ecus(self, command: str, timeout: float = 3.0) -> List[str]:
+        # Every answer of every ECU, NO DATA and errors come back as the single answer like from send_command
+        raw_response = await self.__send(command, timeout, True, True)
+        if self.__frame_parser is not None:
+            answers = list(self.__frame_parser.parse(self.__protocol, raw_response).values())
+        else:
+            answers = self.__parser.split_answers(raw_response)
+        return answers or [self.__parser.join_frames(raw_response)]
+
+    async def __send(self, command: str, timeout: float, force: bool, is_raw: bool) -> str:
         if (not self.is_elm_connected) and (not force):
             raise ConnectionError(self.__generate_log_string("There is no connection, so send_command cannot work"))
+        if self.__is_reconnecting:
+            raise CommandError(self.__generate_log_string(f"Reconnecting to {self.__transport.name}, '{command}' command cannot be sent"))
         
+        stats = self.__stats
+        if stats is not None:
+            lock_requested = time.perf_counter()
         async with self.__command_lock:
-            try:
-                self.__writer.write((command + "\r").encode())
-                await self.__writer.drain()
-                await asyncio.sleep(0.1)  # Short delay to allow for response
-                
-                response = b""
-                start_time = asyncio.get_event_loop().time()
-                
-                while True:
-                    if asyncio.get_event_loop().time() - start_time > timeout:
-                        raise asyncio.TimeoutError()
-                    
-                    chunk = await asyncio.wait_for(self.__reader.read(1024), timeout=timeout)
-                    if not chunk:
-                        break
-                    response += chunk
-                    if b'\r' in chunk:
-                        break
-                
-                decoded_response = response.decode().strip()
-                if decoded_response.endswith('>'):
-                    decoded_response = decoded_response[:-1].strip()
-                if "\r" in decoded_response: # for 00\r410400 case for example I don't know why happened ? TODO
-                    decoded_response = decoded_response.split("\r")[-1]
-                
-                return decoded_response
-            
-            except asyncio.TimeoutError:
-                raise CommandError(self.__generate_log_string(f"Cannot get response on time for '{command}' command"))
-            except Exception as e:
-                raise CommandError(self.__generate_log_string(f"A command error occurred due to: {e}"))
+            if stats is not None:
+                stats.record_lock_wait(time.perf_counter() - lock_requested)
+            return await self.__exchange(command, timeout, is_raw)
+
+    async def __exchange(self, command: str, timeout: float = 3.0, is_raw: bool = False) -> str:
+        # Callers hold the command lock
+        stats = self.__stats
+        try:
+            if self.__awaiting_prompt: # Previous command was timed out or cancelled before its prompt
+                await self.__discard_stale_response()
+            self.__read_buffer.clear()
+            if stats is not None:
+                written = time.perf_counter()
+            self.__writer.write((command + "\r").encode())
+            self.__awaiting_prompt = True
+            await self.__writer.drain()
+            raw_response = await self.__read_until_prompt(timeout)
+            if self.__frame_parser is not None and command[:2] != "AT":
+                ecu_responses = self.__frame_parser.parse(self.__protocol, raw_response)
+                response = self.__frame_parser.primary_response(ecu_responses) or self.__parser.join_frames(raw_response)
+                self.__last_response_count = len(ecu_responses)
+            else:
+                response = self.__parser.join_frames(raw_response)
+                if self.__latency_tuner is not None:
+                    self.__last_response_count = self.__parser.count_responses(raw_response)
+            self.__awaiting_prompt = False
+            self.__health.record_response(command, response, asyncio.get_running_loop().time())
+            if stats is not None:
+                stats.record_command(command, time.perf_counter() - written)
+            return raw_response if is_raw else response
+        
+        except asyncio.TimeoutError:
+            self.__health.record_timeout(command, asyncio.get_running_loop().time())
+            if stats is not None:
+                stats.record_timeout(command)
+            raise CommandError(self.__generate_log_string(f"Cannot get response on time for '{command}' command"))
+        except Exception as e:
+            if isinstance(e, (ConnectionError, OSError)): # Unplugged adapters fail on both reading and writing
+                self.__is_link_broken = True
+            self.__health.record_timeout(command, asyncio.get_running_loop().time())
+            raise CommandError(self.__generate_log_string(f"A command error occurred due to: {e}"))
+
+    async def __read_until_prompt(self, timeout: float) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            prompt_index = self.__read_buffer.find(DpyOBD.ELM_PROMPT)
+            if prompt_index >= 0:
+                response = bytes(self.__read_buffer[:prompt_index])
+                del self.__read_buffer[:prompt_index + 1]
+                return response.decode(errors="ignore").replace("\x00", "")
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            chunk = await asyncio.wait_for(self.__reader.read(DpyOBD.READ_CHUNK_SIZE), timeout=remaining)
+            if not chunk:
+                raise ConnectionError(self.__generate_log_string("Serial connection is closed by the device"))
+            self.__read_buffer += chunk
+
+    async def __discard_stale_response(self):
+        try:
+            await self.__read_until_prompt(DpyOBD.STALE_RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        self.__awaiting_prompt = False
+
+    async def query(self, pid: DpyOBData.COMMANDS, max_age: float = 1.0, is_raw: bool = False) -> Any:
+        # Answer a watcher got at most max_age seconds ago, otherwise one request that every caller of the pid waits for
+        if not self.is_pid_supported(pid):
+            raise CommandError(self.__generate_log_string(f"{pid} is not supported by the vehicle"))
+        latest = self.__latest_responses.get(pid)
+        if latest is not None and asyncio.get_running_loop().time() - latest[0] <= max_age:
+            response = latest[1]
+        else:
+            request = self.__pending_queries.get(pid)
+            if request is None:
+                request = asyncio.ensure_future(self.__query_pid(pid))
+                self.__pending_queries[pid] = request
+                request.add_done_callback(lambda finished: self.__finish_query(pid, finished))
+            response = await asyncio.shield(request) # A cancelled caller does not cancel the others
+        return response if is_raw else self.__parser.general_parser_func(pid, response)
+
+    def __finish_query(self, pid: DpyOBData.COMMANDS, request: asyncio.Future) -> None:
+        self.__pending_queries.pop(pid, None)
+        if not request.cancelled():
+            request.exception() # Marked as retrieved, every caller may have been cancelled before it failed
 
-    async def watch(self, pid: DpyOBData.COMMANDS, callback: Callable[[Optional[int], Any], Any], is_raw: bool = False):
+    async def __query_pid(self, pid: DpyOBData.COMMANDS) -> str:
+        response = await self.__send_pid_request([pid])
+        if response[:4] == "41" + pid.value:
+            self.__latest_responses[pid] = (asyncio.get_running_loop().time(), response)
+        return response
+
+    async def watch(self, pid: DpyOBData.COMMANDS, callback: Callable[[Optional[int], Any], Any], is_raw: bool = False, rate: float = None, priority: int = 0, on_change: bool = False, deadband: float = None, deadband_percent: float = None, max_silence: float = None):
         if pid in self.__watching:
             self.__print(f"Already watching {pid}")
             return
-        self.__watching[pid] = asyncio.create_task(self.__watch_task(pid, callback, is_raw))
+        if not self.is_pid_supported(pid):
+            raise WatchingError(self.__generate_log_string(f"{pid} is not supported by the vehicle"))
+        if rate is None:
+            rate = 1 / self.__watching_interval
+        if rate <= 0:
+            raise WatchingError(self.__generate_log_string(f"Watching rate of {pid} must be positive"))
+        delivery_filter = None
+        if on_change or deadband is not None or deadband_percent is not None or max_silence is not None:
+            try:
+                delivery_filter = DpyOBDFilter(on_change, deadband, deadband_percent, max_silence)
+            except ValueError as e:
+                raise WatchingError(self.__generate_log_string(f"{e}"))
+        delivery = DpyOBDDelivery(lambda value: self.__call_watcher(pid, callback, pid, value), on_drop=lambda: self.__count_dropped(pid))
+        self.__watching[pid] = (delivery, is_raw, delivery_filter)
+        self.__add_consumer(pid, DpyOBD.WATCH_CONSUMER, rate, priority)
+
+    def stream(self, pids: Iterable[DpyOBData.COMMANDS], max_size: int = 1024, overflow: DpyOBDOverflow = DpyOBDOverflow.DROP_OLDEST, rate: float = None, priority: int = 0) -> DpyOBDStream:
+        # Samples are queued per subscriber, so a slow consumer never holds up the poll loop
+        pids = list(pids)
+        for pid in pids:
+            if not self.is_pid_supported(pid):
+                raise WatchingError(self.__generate_log_string(f"{pid} is not supported by the vehicle"))
+        if rate is None:
+            rate = 1 / self.__watching_interval
+        if rate <= 0:
+            raise WatchingError(self.__generate_log_string("Streaming rate must be positive"))
+        stream = DpyOBDStream(pids, max_size, overflow, on_close=self.__close_stream)
+        self.__streams.append(stream)
+        for pid in pids:
+            self.__add_consumer(pid, stream, rate, priority)
+        self.__print(f"Started streaming {', '.join(str(pid) for pid in pids)}")
+        return stream
+
+    def aggregate(self, pid: DpyOBData.COMMANDS, callback: Callable[[Any], Any], window: float, step: float = None, rate: float = None, priority: int = 0) -> DpyOBDAggregator:
+        # callback gets one DpyOBDAggregate per window instead of every sample, windows slide by step when it is given
+        if not self.is_pid_supported(pid):
+            raise WatchingError(self.__generate_log_string(f"{pid} is not supported by the vehicle"))
+        if rate is None:
+            rate = 1 / self.__watching_interval
+        if rate <= 0:
+            raise WatchingError(self.__generate_log_string(f"Watching rate of {pid} must be positive"))
+        try:
+            aggregator = DpyOBDAggregator(pid, window, step)
+        except ValueError as e:
+            raise WatchingError(self.__generate_log_string(f"{e}"))
+        delivery = DpyOBDDelivery(lambda summary: self.__call_watcher(pid, callback, summary), on_drop=lambda: self.__count_dropped(pid))
+        self.__aggregators.setdefault(pid, list()).append((aggregator, delivery))
+        self.__add_consumer(pid, aggregator, rate, priority)
+        self.__print(f"Started aggregating {pid} over {aggregator.window}s windows")
+        return aggregator
+
+    async def unaggregate(self, aggregator: DpyOBDAggregator) -> bool:
+        entries = self.__aggregators.get(aggregator.pid, list())
+        entry = next((entry for entry in entries if entry[0] is aggregator), None)
+        if entry is None:
+            self.__print(f"Not aggregating {aggregator.pid} with this aggregator")
+            return False
+        entries.remove(entry)
+        if not entries:
+            self.__aggregators.pop(aggregator.pid)
+        self.__release_pid(aggregator.pid, aggregator)
+        for summary in aggregator.flush(): # The open window is reported too
+            entry[1].deliver(summary)
+        entry[1].close(drain=True)
+        self.__print(f"Stopped aggregating {aggregator.pid}")
+        return True
+
+    async def __call_watcher(self, key: Any, callback: Callable, *args: Any) -> None:
+        # Runs in the delivery task of the consumer, never in the poll loop
+        stats = self.__stats
+        try:
+            if stats is None:
+                await callback(*args)
+                return
+            callback_started = time.perf_counter()
+            await callback(*args)
+            stats.record_callback(key, time.perf_counter() - callback_started)
+        except Exception as e:
+            self.__print(f"An error occurred while watching {key}: {e}")
+
+    def __count_dropped(self, key: Any) -> None:
+        if self.__stats is not None:
+            self.__stats.count_pid(key, "callback_dropped")
+
+    def __close_stream(self, stream: DpyOBDStream) -> None:
+        if stream in self.__streams:
+            self.__streams.remove(stream)
+        for pid in stream.pids:
+            self.__release_pid(pid, stream)
+        self.__print(f"Stopped streaming {', '.join(str(pid) for pid in stream.pids)}")
+
+    def __add_consumer(self, pid: DpyOBData.COMMANDS, consumer: Any, rate: float, priority: int) -> None:
+        self.__pid_consumers.setdefault(pid, dict())[consumer] = (rate, priority)
+        self.__update_pid_schedule(pid)
+
+    def __release_pid(self, pid: DpyOBData.COMMANDS, consumer: Any) -> None:
+        # A pid is polled as long as a watcher, an aggregator or a stream still needs it
+        consumers = self.__pid_consumers.get(pid, dict())
+        consumers.pop(consumer, None)
+        if consumers:
+            self.__update_pid_schedule(pid)
+            return
+        self.__pid_consumers.pop(pid, None)
+        self.__scheduler.remove(pid)
+        if self.__stats is not None:
+            self.__stats.watch_stopped(pid)
 
-    async def __watch_task(self, pid: DpyOBData.COMMANDS, callback: Callable[[Optional[int], Any], Any], is_raw: bool = False):
+    def __update_pid_schedule(self, pid: DpyOBData.COMMANDS) -> None:
+        # Polled for its most demanding consumer, the fastest rate and the highest priority of all of them
+        consumers = self.__pid_consumers[pid].values()
+        rate = max(rate for rate, _ in consumers)
+        priority = max(priority for _, priority in consumers)
+        if pid in self.__scheduler:
+            if (self.__scheduler.rate(pid), self.__scheduler.priority(pid)) == (rate, priority):
+                return
+            self.__scheduler.update(pid, rate, priority)
+            self.__check_scheduler_load()
+        else:
+            self.__schedule(pid, rate, priority)
+        if self.__stats is not None:
+            self.__stats.watch_started(pid, rate)
+
+    def __is_held_back(self, key: Any) -> bool:
+        # Back pressure of a full blocking stream only pauses polling when nothing else needs the pid
+        consumers = self.__pid_consumers.get(key)
+        if not consumers or self.__recorder is not None or self.__sample_bus is not None:
+            return False
+        return all(isinstance(consumer, DpyOBDStream) and consumer.overflow == DpyOBDOverflow.BLOCK and consumer.is_full for consumer in consumers)
+
+    def __schedule(self, key: Any, rate: float, priority: int) -> None:
+        self.__scheduler.add(key, rate, priority, asyncio.get_running_loop().time())
+        self.__check_scheduler_load()
+        if self.__dispatch_task is None or self.__dispatch_task.done():
+            self.__dispatch_task = asyncio.create_task(self.__dispatch_loop())
+        self.__dispatch_wakeup.set()
+
+    async def __dispatch_loop(self):
+        loop = asyncio.get_running_loop()
         while True:
-            try:
-                response = await self.send_command(f"01{pid.value}")
-                if not is_raw:
-                    response = self.__parser.general_parser_func(pid, response)
-                await callback(pid, response)
-            except asyncio.CancelledError:
+            now = loop.time()
+            due_keys = self.__scheduler.due(now)
+            if self.__streams:
+                # Pids that only full blocking streams need skip this turn, so the other pids keep their rates
+                held_keys = [key for key in due_keys if self.__is_held_back(key)]
+                for key in held_keys:
+                    self.__scheduler.complete(key, now)
+                due_keys = [key for key in due_keys if key not in held_keys]
+            if not due_keys:
+                await self.__wait_for_next_deadline(now)
+                continue
+
+            if isinstance(due_keys[0], DpyOBData.COMMANDS):
+                keys = self.__group_due_pids(due_keys, now)
+                await self.__poll_pids(keys)
+            else:
+                keys = due_keys[:1]
+                await self.__run_built_in_watcher(keys[0])
+
+            finished = loop.time()
+            self.__scheduler.record_request(finished - now, len(keys))
+            for key in keys:
+                self.__scheduler.complete(key, finished)
+            self.__check_scheduler_load()
+
+            if self.__auto_reconnect and (self.__is_link_broken or self.__health.is_lost):
+                await self.__reconnect()
+
+    async def __reconnect(self) -> None:
+        # Watchers stay scheduled while reconnecting, they continue where they were once the adapter answers again
+        self.__is_reconnecting = True
+        self.__connection_status = DpyOBDStatus.NOT_CONNECTED
+        self.__print(f"Lost {self.__transport.name}, reconnecting")
+        delay = DpyOBD.RECONNECT_INTERVAL
+        try:
+            while True:
+                async with self.__command_lock:
+                    if await self.__restore_session():
+                        break
+                self.__print(f"Cannot reconnect, retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, DpyOBD.MAX_RECONNECT_INTERVAL)
+        finally:
+            self.__is_reconnecting = False
+        self.__print(f"Reconnected to {self.__transport.name}")
+
+    async def __restore_session(self) -> bool:
+        # Same transport and the already negotiated protocol, so there is no detection and no protocol search
+        try:
+            await self.__release_link()
+        except Exception:
+            pass # The old link is already gone
+        try:
+            self.__reader, self.__writer = await self.__transport.open()
+        except Exception:
+            return False
+        self.__read_buffer.clear()
+        self.__awaiting_prompt = False
+        self.__is_link_broken = False
+        self.__health.reset()
+
+        settings_kept = await self.__probe_adapter()
+        try:
+            if settings_kept is None: # Adapter does not answer at all, only a reset can bring it back
+                await self.__exchange("ATZ")
+            if not settings_kept:
+                for command in self.__setup_commands():
+                    await self.__exchange(command)
+                await self.__exchange(f"ATSP{self.__protocol}")
+                if self.__latency_tuner is not None:
+                    await self.__enable_adaptive_timing()
+        except CommandError:
+            return False
+        self.__connection_status = DpyOBDStatus.ELM_CONNECTED # Status watcher finds out the rest
+        return True
+
+    async def __probe_adapter(self) -> Optional[bool]:
+        # None when the adapter does not answer, otherwise whether it kept its settings, a reset adapter echoes again
+        try:
+            self.__writer.write(b"ATI\r")
+            await self.__writer.drain()
+            response = await self.__read_until_prompt(DpyOBD.RECONNECT_PROBE_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            self.__awaiting_prompt = True
+            return None
+        return "ATI" not in response
+
+    async def __wait_for_next_deadline(self, now: float):
+        next_deadline = self.__scheduler.next_deadline()
+        self.__dispatch_wakeup.clear()
+        try:
+            await asyncio.wait_for(self.__dispatch_wakeup.wait(), timeout=None if next_deadline is None else next_deadline - now)
+        except asyncio.TimeoutError:
+            pass
+
+    def __group_due_pids(self, due_keys: List[Any], now: float) -> List[DpyOBData.COMMANDS]:
+        # Only CAN protocols answer multi pid requests, K-line and J1850 get one pid per request
+        group_size = DpyOBData.MAX_PIDS_PER_REQUEST if self.__protocol in DpyOBData.CAN_PROTOCOLS and self.__is_multi_pid_supported else 1
+        pids = [key for key in due_keys if isinstance(key, DpyOBData.COMMANDS)][:group_size]
+        # Fill the rest of the request with pids that would be due before its response arrives
+        for key in self.__scheduler.due(now + self.__scheduler.round_trip):
+            if len(pids) >= group_size:
                 break
+            if isinstance(key, DpyOBData.COMMANDS) and key not in pids and not self.__is_held_back(key):
+                pids.append(key)
+        return pids
+
+    def __check_scheduler_load(self) -> None:
+        is_overloaded = self.__scheduler.is_overloaded
+        if is_overloaded and not self.__is_scheduler_overloaded:
+            self.__print(f"Requested watching rates need {self.__scheduler.load:.0%} of the link, they cannot all be delivered")
+        self.__is_scheduler_overloaded = is_overloaded
+
+    async def __enable_adaptive_timing(self) -> None:
+        # Callers hold the command lock, ATAT2 is the aggressive adaptive timing of ELM327 v1.2 and later
+        if "?" in await self.__exchange("ATAT2"):
+            await self.__exchange("ATAT1")
+        await self.__exchange(f"ATST{self.__latency_tuner.timeout:02X}")
+
+    async def __send_pid_request(self, pids: List[DpyOBData.COMMANDS]) -> str:
+        command = "01" + "".join(pid.value for pid in pids)
+        tuner = self.__latency_tuner
+        if tuner is None:
+            return await self.send_command(command)
+
+        # With the number of answering ECUs appended, the ELM327 sends the prompt without waiting for more answers
+        loop = asyncio.get_running_loop()
+        response_count = tuner.response_count(command)
+        if response_count is not None:
+            started = loop.time()
+            response = await self.send_command(f"{command}{response_count}")
+            if tuner.is_complete(command, response):
+                await self.__tune_timeout(tuner.record_response_time(loop.time() - started))
+                return response
+            tuner.forget_response_count(command)
+            await self.__tune_timeout(tuner.record_missing_answer())
+
+        response = await self.send_command(command) # Learns the answer count, only hinted answers are timed
+        if response[:2] == "41":
+            tuner.learn_response_count(command, self.__last_response_count, response)
+        return response
+
+    async def __tune_timeout(self, timeout: Optional[int]) -> None:
+        if timeout is not None:
+            await self.send_command(f"ATST{timeout:02X}")
+
+    async def __request_pids(self, pids: List[DpyOBData.COMMANDS]) -> Dict[DpyOBData.COMMANDS, str]:
+        response = await self.__send_pid_request(pids)
+        if len(pids) == 1:
+            return {pids[0]: response}
+        try:
+            responses = self.__parser.split_multi_pid_response(pids, response)
+            self.__multi_pid_failures = 0
+            return responses
+        except ParserError:
+            pass
+
+        # Some ECUs reject multi pid requests even on CAN, retry one pid at a time
+        responses = dict()
+        for pid in pids:
+            try:
+                responses[pid] = await self.__send_pid_request([pid])
+            except CommandError:
+                continue
+        # Bus errors and cut answers are passing, only a rejection of pids that answer one by one counts
+        is_rejected = response.startswith("NO DATA") or response[:2] == "7F"
+        if is_rejected and any(pid_response[:2] == "41" for pid_response in responses.values()):
+            self.__multi_pid_failures += 1
+            if self.__multi_pid_failures >= DpyOBD.MULTI_PID_FAILURE_LIMIT:
+                self.__is_multi_pid_supported = False
+                self.__print("Vehicle does not answer multi pid requests, pids will be requested one by one")
+        return responses
+
+    async def __poll_pids(self, pids: List[DpyOBData.COMMANDS]):
+        try:
+            responses = await self.__request_pids(pids)
+        except Exception as e:
+            self.__print(f"An error occurred while watching {', '.join(str(pid) for pid in pids)}: {e}")
+            return
+
+        timestamp = time.time()
+        loop = asyncio.get_running_loop()
+        stats = self.__stats
+        if stats is not None:
+            for pid in pids:
+                if pid not in responses: # Left out of a multi pid answer
+                    stats.count_pid(pid, "no_data")
+        now = loop.time()
+        for pid, pid_response in responses.items():
+            if pid_response[:4] == "41" + pid.value: # Fresh enough answers are handed to query callers
+                self.__latest_responses[pid] = (now, pid_response)
+            streams = [stream for stream in self.__streams if pid in stream.pids] if self.__streams else None
+            aggregators = self.__aggregators.get(pid)
+            if pid not in self.__watching and not streams and not aggregators: # Unwatched while waiting for the response
+                continue
+            delivery, is_raw, delivery_filter = self.__watching.get(pid, (None, True, None))
+            try:
+                is_answered = pid_response[:4] == "41" + pid.value
+                # Unchanged responses are recognized by their bytes, a filtered callback does not need them decoded
+                is_repeated = delivery_filter is not None and delivery_filter.is_repeated(pid_response, loop.time())
+                value = None
+                if (not is_raw and not is_repeated) or self.__recorder is not None or self.__sample_bus is not None or streams or aggregators:
+                    try:
+                        value = self.__parser.general_parser_func(pid, pid_response)
+                    except Exception:
+                        if stats is not None:
+                            stats.count_pid(pid, "parse_errors")
+                        raise
+                if is_answered and (self.__recorder is not None or self.__sample_bus is not None or streams):
+                    sample = DpyOBDSample(timestamp, pid, value, bytes.fromhex(pid_response[4:]))
+                    if self.__recorder is not None:
+                        self.__recorder.record(sample)
+                    if self.__sample_bus is not None:
+                        self.__sample_bus.publish(sample)
+                    if streams:
+                        for stream in streams:
+                            stream.publish(sample)
+                if aggregators and is_answered:
+                    for aggregator, aggregate_delivery in list(aggregators):
+                        for summary in aggregator.add(timestamp, value):
+                            aggregate_delivery.deliver(summary)
+                if stats is not None:
+                    if is_answered:
+                        stats.record_sample(pid, time.perf_counter())
+                    else:
+                        stats.count_pid(pid, "no_data")
+                if delivery is None:
+                    continue
+                if delivery_filter is not None:
+                    if not is_repeated and delivery_filter.needs_value and value is None and is_answered:
+                        value = self.__parser.general_parser_func(pid, pid_response)
+                    if is_repeated or not delivery_filter.accept(pid_response, value, loop.time()):
+                        if stats is not None:
+                            stats.count_pid(pid, "filtered")
+                        continue
+                delivery.deliver(pid_response if is_raw else value)
             except Exception as e:
                 self.__print(f"An error occurred while watching {pid}: {e}")
-            await asyncio.sleep(self.__watching_interval)
+
+    def start_recording(self, path: str) -> DpyOBDRecorder:
+        if self.__recorder is not None:
+            raise WatchingError(self.__generate_log_string(f"Already recording to {self.__recorder.path}"))
+        self.__recorder = DpyOBDRecorder(path)
+        self.__print(f"Started recording to {path}")
+        return self.__recorder
+
+    def stop_recording(self) -> bool:
+        if self.__recorder is None:
+            self.__print("Not recording")
+            return False
+        self.__recorder.close()
+        self.__print(f"Stopped recording to {self.__recorder.path}")
+        self.__recorder = None
+        return True
+
+    def start_sharing(self, name: str = None, capacity: int = DpyOBDSampleBus.DEFAULT_CAPACITY) -> DpyOBDSampleBus:
+        # Samples go to shared memory, other processes read them with a DpyOBDSampleBusReader of the same name
+        if self.__sample_bus is not None:
+            raise WatchingError(self.__generate_log_string(f"Already sharing samples on {self.__sample_bus.name}"))
+        self.__sample_bus = DpyOBDSampleBus(name, capacity)
+        self.__print(f"Started sharing samples on {self.__sample_bus.name}")
+        return self.__sample_bus
+
+    def stop_sharing(self) -> bool:
+        if self.__sample_bus is None:
+            self.__print("Not sharing samples")
+            return False
+        self.__sample_bus.close()
+        self.__print(f"Stopped sharing samples on {self.__sample_bus.name}")
+        self.__sample_bus = None
+        return True
 
     async def unwatch(self, pid: DpyOBData.COMMANDS) -> bool:
         if pid in self.__watching:
-            task = self.__watching.pop(pid)
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+            self.__watching.pop(pid)[0].close()
+            self.__release_pid(pid, DpyOBD.WATCH_CONSUMER)
             self.__print(f"Stopped watching {pid}")
             return True
         else:
@@ -189,21 +874,30 @@ class DpyOBD:
             await self.unwatch(pid)
         self.__print("Stopped watching all PIDs")
 
+    async def __stop_dispatching(self) -> None:
+        if self.__dispatch_task is None:
+            return
+        task, self.__dispatch_task = self.__dispatch_task, None
+        while not task.done():
+            task.cancel()
+            # asyncio.wait_for of Python 3.11 loses the cancellation when its read completes at the same moment
+            await asyncio.wait([task], timeout=DpyOBD.STALE_RESPONSE_TIMEOUT)
+        if not task.cancelled() and task.exception() is not None:
+            self.__print(f"Dispatching stopped with an error: {task.exception()}")
+
     async def __built_in_watch(self, watcher_key: str) -> None:
         if not watcher_key in self.__built_in_watching and watcher_key in self.__built_in_watcher_static_record.keys():
-            watcher_func, callback_func = self.__built_in_watcher_static_record[watcher_key]
-            self.__built_in_watching[watcher_key] = asyncio.create_task(self.__built_in_watcher(watcher=watcher_func, callback=callback_func))
+            self.__built_in_watching.add(watcher_key)
+            self.__schedule(watcher_key, 1 / self.__watching_interval, self.__built_in_watcher_static_record[watcher_key][2])
+            if self.__stats is not None:
+                self.__stats.watch_started(watcher_key, 1 / self.__watching_interval)
 
     async def __built_in_unwatch(self, watcher_key: str) -> None:
         if watcher_key in self.__built_in_watching:
-            task = self.__built_in_watching.pop(watcher_key)
-            task.cancel()
-            try:
-                await asyncio.wait_for(task, timeout=1.0)
-            except asyncio.TimeoutError:
-                self.__print(f"Timeout occurred while cancelling {watcher_key} task. Task might still be running.")
-            except asyncio.CancelledError:
-                pass
+            self.__built_in_watching.remove(watcher_key)
+            self.__scheduler.remove(watcher_key)
+            if self.__stats is not None:
+                self.__stats.watch_stopped(watcher_key)
             self.__print(f"Stopped watching {watcher_key}")
 
     async def __built_in_watchall(self) -> None:
@@ -213,66 +907,125 @@ class DpyOBD:
         self.__print("Started watching all built_in watcher_keys")
 
     async def __built_in_unwatchall(self) -> None:
-        watcher_keys = list(self.__built_in_watching.keys())
+        watcher_keys = list(self.__built_in_watching)
         for watcher_key in watcher_keys:
             await self.__built_in_unwatch(watcher_key)
         self.__print("Stopped watching all built_in watcher keys")
 
-    async def __built_in_watcher(self, watcher: Callable, callback: Callable) -> None:
-        while True:
-            status = await watcher()
-            callback(status)
-            await asyncio.sleep(self.__watching_interval)
-
-    async def __built_in_status_watcher_func(self) -> DpyOBDStatus:
-        # Check the engine runtime to determine if the status is CAR_CONNECTED or not
-        try:
-            response = await self.send_command(command="011C", force=True)
-            if response[:4] == "411C":
-                return DpyOBDStatus.CAR_CONNECTED
-        except:
-            pass
-
-        # Check the voltage answer to determine if the status is OBD_CONNECTED or not
-        try:
-            response = await self.send_command(command="ATRV", force=True)
-            if float(response[:-1]) >= 1:
-                return DpyOBDStatus.OBD_CONNECTED
-        except:
-            pass
-
-        # Check the behaviour of the AT Z reset command to determine if ELM_CONNECTED or not
+    async def __run_built_in_watcher(self, watcher_key: str) -> None:
+        watcher, callback, _ = self.__built_in_watcher_static_record[watcher_key]
         try:
-            await self.send_command(command="ATZ", force=True)
-            return DpyOBDStatus.ELM_CONNECTED
-        except:
-            pass
+            result = await watcher()
+            if self.__stats is None:
+                await callback(result)
+                return
+            self.__stats.record_sample(watcher_key, time.perf_counter())
+            callback_started = time.perf_counter()
+            await callback(result)
+            self.__stats.record_callback(watcher_key, time.perf_counter() - callback_started)
+        except Exception as e:
+            self.__print(f"An error occurred while watching {watcher_key}: {e}")
 
-        return DpyOBDStatus.NOT_CONNECTED
+    async def __built_in_status_watcher_func(self) -> DpyOBDStatus:
+        # Status is inferred from the traffic that already happens, the vehicle is only probed when the link is idle
+        loop = asyncio.get_running_loop()
+        if self.__health.is_idle(loop.time(), self.__watching_interval):
+            try:
+                await self.send_command(command="0100", force=True)
+            except Exception:
+                pass
+        return self.__health.status(loop.time(), DpyOBD.HEALTH_FRESHNESS * self.__watching_interval)
 
-    def __built_in_status_callback_func(self, status: DpyOBDStatus) -> None:
+    async def __built_in_status_callback_func(self, status: DpyOBDStatus) -> None:
         self.__connection_status = status
 
     async def __built_in_elm_voltage_watcher_func(self) -> float:
         try:
             response = await self.send_command("ATRV", force=True)
             return self.__parser.elm_voltage_parser_func(response)
-        except:
+        except Exception:
             return None
 
-    def __built_in_elm_voltage_callback_func(self, voltage: float) -> None:
+    async def __built_in_elm_voltage_callback_func(self, voltage: float) -> None:
         self.__elm_voltage = voltage
 
-    # TODO #
-    async def __built_in_dtc_watcher_func(self):
+    async def __built_in_dtc_watcher_func(self) -> List[DpyOBDDtcChange]:
+        # Only the 4 byte monitor status is polled, code lists are read when the MIL or the stored code count changes
+        if not self.is_pid_supported(DpyOBData.COMMANDS.DTC):
+            return list()
         try:
-            response = await self.send_command("0101", force=True)
-            pass
-        except:
+            statuses = [self.__parser.monitor_status_parser_func(response) for response in await self.__send_to_all_ecus("0101")]
+            status = (any(mil for mil, _ in statuses), sum(count for _, count in statuses))
+        except Exception:
+            return list()
+        now = asyncio.get_running_loop().time()
+        if status == self.__dtc_status and now - self.__dtc_read_time < DpyOBD.DTC_REFRESH_INTERVAL:
+            return list()
+
+        changes = list()
+        has_count = self.__protocol in DpyOBData.CAN_PROTOCOLS
+        for mode in DpyOBData.DTC_MODES.keys():
+            try:
+                codes = frozenset().union(*(self.__parser.dtc_parser_func(mode, response, has_count) for response in await self.__send_to_all_ecus(mode)))
+            except Exception:
+                if mode == "03":
+                    return changes # Read again on the next turn
+                continue # Older vehicles do not know pending or permanent codes
+            previous_codes = self.__dtcs[mode]
+            if codes != previous_codes:
+                changes.append(DpyOBDDtcChange(mode, codes - previous_codes, previous_codes - codes))
+                self.__dtcs[mode] = codes
+        self.__dtc_status = status
+        self.__dtc_read_time = now
+        return changes
+
+    async def __built_in_dtc_callback_func(self, changes: List[DpyOBDDtcChange]) -> None:
+        for change in changes:
+            self.__print(f"{DpyOBData.DTC_MODES[change.mode].capitalize()} codes changed, added: {sorted(change.added)}, cleared: {sorted(change.cleared)}")
+            if self.__dtc_delivery is not None:
+                self.__dtc_delivery.deliver(change)
+
+    def watch_dtcs(self, callback: Callable[[DpyOBDDtcChange], Any]) -> None:
+        # Called with the added and cleared codes of each mode, the built-in dtc watcher does the polling
+        if self.__dtc_delivery is not None:
+            self.__dtc_delivery.close()
+        self.__dtc_delivery = DpyOBDDelivery(lambda change: self.__call_watcher("dtc", callback, change), on_drop=lambda: self.__count_dropped("dtc"))
+
+    def unwatch_dtcs(self) -> bool:
+        if self.__dtc_delivery is None:
+            return False
+        self.__dtc_delivery.close()
+        self.__dtc_delivery = None
+        return True
+
+    def enable_stats(self) -> DpyOBDStats:
+        if self.__stats is None:
+            self.__stats = DpyOBDStats()
+            for key in list(self.__watching.keys()) + list(self.__built_in_watching):
+                self.__stats.watch_started(key, self.__scheduler.rate(key))
+            self.__print("Started collecting stats")
+        return self.__stats
+
+    def disable_stats(self) -> bool:
+        if self.__stats is None:
+            return False
+        self.__stats = None
+        self.__print("Stopped collecting stats")
+        return True
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        if self.__stats is None:
             return None
+        snapshot = self.__stats.snapshot()
+        snapshot["scheduler"] = {"load": self.__scheduler.load, "round_trip": self.__scheduler.round_trip}
+        return snapshot
+
+    def add_stats_hook(self, hook: Callable[[str, Optional[str], float], Any]) -> None:
+        # hook(metric, key, value) is called on every measurement, adding a hook enables the stats
+        self.enable_stats().add_hook(hook)
 
-    def __built_in_dtc_callback_func(self, dummy):
-        pass
+    def remove_stats_hook(self, hook: Callable[[str, Optional[str], float], Any]) -> bool:
+        return self.__stats is not None and self.__stats.remove_hook(hook)
 
     async def change_protocol(self, protocol_number: str) -> bool:
         if protocol_number in DpyOBData.PROTOCOLS.keys():
@@ -281,17 +1034,22 @@ class DpyOBD:
             except:
                 return False
             
-            try:
-                protocol_number = await self.send_command("ATDPN", force=True)
-                protocol_number = protocol_number[-1]
-            except:
-                pass
-
             self.__protocol = protocol_number
+            self.__is_protocol_searched = protocol_number == "0"
+            await self.__read_protocol_number()
             self.__print(f"Protocol set to: {self.protocol_number}-{self.protocol_name}")
         else:
             raise CommandError("Given protocol number does not exist")
 
+    async def __read_protocol_number(self) -> None:
+        # "A6" while searching automatically, the last character is the protocol number either way
+        try:
+            protocol_number = (await self.send_command("ATDPN", force=True))[-1]
+        except Exception:
+            return
+        if protocol_number in DpyOBData.PROTOCOLS.keys():
+            self.__protocol = protocol_number
+
     @property
     def connection_status(self) -> DpyOBDStatus:
         return self.__connection_status
@@ -300,6 +1058,22 @@ class DpyOBD:
     def elm_voltage(self) -> float:
         return self.__elm_voltage
 
+    @property
+    def dtcs(self) -> FrozenSet[str]:
+        return self.__dtcs["03"]
+
+    @property
+    def pending_dtcs(self) -> FrozenSet[str]:
+        return self.__dtcs["07"]
+
+    @property
+    def permanent_dtcs(self) -> FrozenSet[str]:
+        return self.__dtcs["0A"]
+
+    @property
+    def is_mil_on(self) -> Optional[bool]:
+        return None if self.__dtc_status is None else self.__dtc_status[0]
+
     @property
     def is_obd_connected(self) -> bool:
         return DpyOBDStatus.is_obd_connected(self.__connection_status)
@@ -308,6 +1082,15 @@ class DpyOBD:
     def is_elm_connected(self) -> bool:
         return DpyOBDStatus.is_elm_connected(self.__connection_status)
     
+    @property
+    def is_reconnecting(self) -> bool:
+        return self.__is_reconnecting
+
+    @property
+    def is_adapter_lost(self) -> bool:
+        # Commands stopped being answered, known without waiting for the status watcher
+        return self.__health.is_lost
+
     @property
     def is_ignition_on(self) -> bool:
         """if self.is_obd_connected:
@@ -320,6 +1103,26 @@ class DpyOBD:
             return False"""
         return self.__connection_status == DpyOBDStatus.CAR_CONNECTED
     
+    def is_pid_supported(self, pid: DpyOBData.COMMANDS) -> bool:
+        # Pids are not restricted while the supported pids are unknown
+        return self.__supported_pids is None or pid.value in self.__supported_pids
+
+    @property
+    def supported_pids(self) -> Optional[FrozenSet[str]]:
+        return self.__supported_pids
+
+    @property
+    def vin(self) -> Optional[str]:
+        return self.__vin
+
+    @property
+    def scheduler_load(self) -> float:
+        return self.__scheduler.load
+
+    @property
+    def transport(self) -> Optional[DpyOBDTransport]:
+        return self.__transport
+
     @property
     def protocol_number(self) -> str:
         return self.__protocol
@@ -1,18 +1,17 @@
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from dpyothers import DpyOBData, ParserError
 
+try:
+    import numpy as np
+except ImportError: # Only the batch parser needs NumPy
+    np = None
+
 class DpyOBDParser():
-    def __init__(self) -> None:
-        self.__parser_map = {
-            DpyOBData.COMMANDS.DTC: self.__dtc_parser,
-            DpyOBData.COMMANDS.RPM: self.__rpm_parser,
-            DpyOBData.COMMANDS.SPEED: self.__speed_parser,
-            DpyOBData.COMMANDS.ENGINE_RUN_TIME: self.__engine_run_time_parser,
-            DpyOBData.COMMANDS.ENGINE_LOAD: self.__engine_load_parser,
-            DpyOBData.COMMANDS.COOLANT_TEMP: self.__coolant_temp_parser,
-            DpyOBData.COMMANDS.INTAKE_PRESSURE: self.__intake_pressure_parser,
-            DpyOBData.COMMANDS.THROTTLE_POS: self.__throttle_position_parser,
-        }
-        
+    FRAME_CHARACTERS = set("0123456789ABCDEF:") # Headers off answers and frame lines, spaces are removed before
+    # "41<pid>" -> (pid, length of a single pid response), for matching responses without parsing them
+    SINGLE_RESPONSES = {f"41{pid.value}": (pid, 4 + pid_data.length * 2) for pid, pid_data in DpyOBData.PIDS.items()}
+
     def general_parser_func(self, pid: DpyOBData.COMMANDS, response: str):
         status_code = response[0]
         if status_code == "4":
@@ -20,9 +19,7 @@ class DpyOBDParser():
             if mode_code == "1":
                 pid_code = response[2:4]
                 if pid_code == pid.value:
-                    payload = response[4:]
-                    parser_func = self.__parser_map[pid]
-                    return parser_func(payload)
+                    return self.payload_parser_func(pid, response[4:])
                 else:
                     raise ParserError("Response pid and current pid mismatch")
             else:
@@ -32,49 +29,174 @@ class DpyOBDParser():
             # TODO add errors for F
             pass
 
+    def payload_parser_func(self, pid: DpyOBData.COMMANDS, payload: str):
+        pid_data = DpyOBData.PIDS[pid]
+        try:
+            data = bytes.fromhex(payload[:pid_data.length * 2])
+        except ValueError:
+            raise ParserError(f"Payload of {pid.value} is not hexadecimal: {payload}")
+        if len(data) < pid_data.length:
+            raise ParserError(f"Payload of {pid.value} is shorter than {pid_data.length} bytes: {payload}")
+        return pid_data.formula(*data)
+
+    def batch_parser_func(self, responses: Iterable[str]) -> Dict[DpyOBData.COMMANDS, "np.ndarray"]:
+        if np is None:
+            raise ParserError("NumPy is required for batch parsing")
+
+        # Collect the responses of each pid first so that every pid is decoded by one vectorized formula call
+        single_responses = defaultdict(list)
+        payloads = defaultdict(list)
+        for response in responses:
+            response_data = DpyOBDParser.SINGLE_RESPONSES.get(response[:4])
+            if response_data is not None and len(response) == response_data[1]:
+                single_responses[response_data[0]].append(response)
+            elif response[:2] == "41": # Multi pid response
+                try:
+                    for pid, pid_response in self.__split_pid_responses(response, self.__find_pid).items():
+                        payloads[pid].append(pid_response[4:])
+                except ParserError:
+                    continue
+
+        results = dict()
+        for pid in single_responses.keys() | payloads.keys():
+            pid_data = DpyOBData.PIDS[pid]
+            try:
+                data = np.frombuffer(bytes.fromhex("".join(single_responses[pid])), dtype=np.uint8).reshape(-1, 2 + pid_data.length)[:, 2:]
+                if payloads[pid]:
+                    extra_data = np.frombuffer(bytes.fromhex("".join(payloads[pid])), dtype=np.uint8).reshape(-1, pid_data.length)
+                    data = np.concatenate((data, extra_data))
+            except ValueError: # A corrupted response in the batch, skip it by converting this pid one payload at a time
+                pid_payloads = [response[4:] for response in single_responses[pid]] + payloads[pid]
+                data = np.array([list(bytes.fromhex(payload)) for payload in pid_payloads if self.__is_hexadecimal(payload)], dtype=np.uint8).reshape(-1, pid_data.length)
+            values = pid_data.formula(*data.astype(np.int64).T)
+            results[pid] = np.column_stack(values) if isinstance(values, tuple) else np.asarray(values)
+        return results
+
+    def __is_hexadecimal(self, text: str) -> bool:
+        try:
+            bytes.fromhex(text)
+            return True
+        except ValueError:
+            return False
+
+    def join_frames(self, response: str) -> str:
+        lines = [line.strip() for line in response.split("\r") if line.strip() and not self.__is_info_line(line.strip())]
+        if not lines:
+            return ""
+        # ISO 15765-4 multi frame responses come as "<byte count>\r0:<data>\r1:<data>..." when headers are off
+        frames = [line[2:].replace(" ", "") for line in lines if len(line) > 2 and line[1] == ":"]
+        if not frames:
+            return lines[-1]
+        joined = "".join(frames)
+        try:
+            byte_count = int(lines[0], 16)
+            return joined[:byte_count * 2]
+        except ValueError:
+            return joined
+
+    def split_answers(self, response: str) -> List[str]:
+        # Every message of a headers off response, several ECUs answer with one line or one multi frame message each
+        answers = list()
+        byte_counts = list()
+        for line in response.split("\r"):
+            line = line.strip().replace(" ", "")
+            if not line or not set(line) <= DpyOBDParser.FRAME_CHARACTERS: # NO DATA, progress lines and errors
+                continue
+            if len(line) > 2 and line[1] == ":":
+                if answers and byte_counts[-1] is not None: # Frame of the multi frame message that was started last
+                    answers[-1] += line[2:]
+            elif len(line) <= 3: # Byte count that starts a multi frame message
+                answers.append("")
+                byte_counts.append(int(line, 16))
+            else:
+                answers.append(line)
+                byte_counts.append(None)
+        return [answer if byte_count is None else answer[:byte_count * 2] for answer, byte_count in zip(answers, byte_counts) if answer]
+
+    def count_responses(self, response: str) -> int:
+        # Messages in a raw response, a multi frame message is counted once by its byte count line
+        count = 0
+        for line in response.split("\r"):
+            line = line.strip()
+            if not line or self.__is_info_line(line) or line == "NO DATA" or (len(line) > 2 and line[1] == ":"):
+                continue
+            count += 1
+        return count
+
+    def __is_info_line(self, line: str) -> bool:
+        return any(line.startswith(message) for message in DpyOBData.ELM_INFO_MESSAGES)
+
+    def split_multi_pid_response(self, pids: List[DpyOBData.COMMANDS], response: str) -> Dict[DpyOBData.COMMANDS, str]:
+        if response[:2] != "41":
+            raise ParserError(f"Unexpected multi pid response: {response}")
+        pid_codes = {pid.value: pid for pid in pids}
+        return self.__split_pid_responses(response, pid_codes.get)
+
+    def __find_pid(self, pid_code: str) -> Optional[DpyOBData.COMMANDS]:
+        try:
+            return DpyOBData.COMMANDS(pid_code)
+        except ValueError:
+            return None
+
+    def __split_pid_responses(self, response: str, find_pid: Callable[[str], Optional[DpyOBData.COMMANDS]]) -> Dict[DpyOBData.COMMANDS, str]:
+        responses = dict()
+        index = 2
+        while index + 2 <= len(response):
+            pid = find_pid(response[index:index + 2])
+            if pid is None:
+                raise ParserError(f"Unexpected pid {response[index:index + 2]} in multi pid response")
+            payload_end = index + 2 + DpyOBData.PIDS[pid].length * 2
+            if payload_end > len(response):
+                raise ParserError(f"Multi pid response is truncated at pid {pid.value}")
+            responses[pid] = "41" + response[index:payload_end]
+            index = payload_end
+        return responses
+
+    def supported_pids_parser_func(self, base_pid: int, responses: List[str]) -> Set[str]:
+        # Bitmaps of every answering ECU are combined, at least one of them has to be valid
+        answers = [response for response in responses if response[:4] == f"41{base_pid:02X}" and len(response) >= 12]
+        if not answers:
+            raise ParserError(f"Unexpected supported pids response: {responses}")
+        bitmap = 0
+        for answer in answers:
+            try:
+                bitmap |= int(answer[4:12], 16)
+            except ValueError:
+                continue
+        # Bit A7 is pid base+1, bit D0 is pid base+32 which also tells that the next range is supported
+        return {f"{base_pid + i + 1:02X}" for i in range(32) if bitmap & (1 << (31 - i))}
+
+    def vin_parser_func(self, response: str) -> str:
+        if response[:4] != "4902":
+            raise ParserError(f"Unexpected VIN response: {response}")
+        vin = bytes.fromhex(response[6:]).decode(errors="ignore").replace("\x00", "").strip()
+        if len(vin) != 17 or not vin.isalnum():
+            raise ParserError(f"Invalid VIN: {vin}")
+        return vin
+
+    def monitor_status_parser_func(self, response: str) -> Tuple[bool, int]:
+        # (MIL is on, number of stored codes) from the first byte of pid 01
+        if response[:4] != "4101" or len(response) < 12:
+            raise ParserError(f"Unexpected monitor status response: {response}")
+        status = int(response[4:6], 16)
+        return bool(status & 0x80), status & 0x7F
+
+    def dtc_parser_func(self, mode: str, response: str, has_count: bool) -> Set[str]:
+        if response.startswith("NO DATA"): # Nothing stored for this mode
+            return set()
+        if response[:2] != f"4{mode[1]}":
+            raise ParserError(f"Unexpected mode {mode} response: {response}")
+        payload = response[4:] if has_count else response[2:] # CAN answers start with the number of codes
+        codes = set()
+        for index in range(0, len(payload) - 3, 4):
+            code = int(payload[index:index + 4], 16)
+            if code == 0: # K-line and J1850 pad their frames with empty codes
+                continue
+            codes.add(f"{DpyOBData.DTC_CATEGORIES[code >> 14]}{(code >> 12) & 0x3}{code & 0xFFF:03X}")
+        return codes
+
     def elm_voltage_parser_func(self, response: str) -> float:
         if response[-1] == "V":
             return float(response[:-1])
         else:
             return None
-
-    def __rpm_parser(self, payload: str) -> float:
-        A = int(payload[:2], 16)
-        B = int(payload[2:], 16)
-        return ((256*A)+B)/4
-
-    def __speed_parser(self, payload: str) -> float:
-        A = int(payload, 16)
-        return A
-    
-    def __engine_run_time_parser(self, payload: str) -> float:
-        A = int(payload[:2], 16)
-        B = int(payload[2:], 16)
-        return 256*A+B
-    
-    def __engine_load_parser(self, payload: str) -> float:
-        A = int(payload, 16)
-        return A / 2.55
-
-    def __coolant_temp_parser(self, payload: str):
-        A = int(payload, 16)
-        return A - 40
-
-    def __throttle_position_parser(self, payload: str) -> float:
-        A = int(payload, 16)
-        return A / 2.55
-
-    def __intake_pressure_parser(self, payload: str):
-        return int(payload, 16)
-    
-    def __dtc_parser(self, payload: str):
-        A = bin(int(payload[:2], 16))[2:]
-        B = bin(int(payload[2:4], 16))[2:]
-        C = bin(int(payload[4:6], 16))[2:]
-        D = bin(int(payload[6:8], 16))[2:]
-
-        # A type diagnosis #
-        MIL = bool(A[0]) # A7 the most significant bit, malfunction indicator lamp (on True/off False)
-        emission_related_dtc_count = int(A[1:]) # The total number of dtcs that is about the emission related problems
-        # B type diagnosis #
-        
\ No newline at end of file
@@ -1,4 +1,6 @@
+import os
 from enum import Enum
+from typing import Any, Callable, FrozenSet, NamedTuple, Optional
 
 # ============================== # DpyOBDStatus # ============================== #
 
@@ -14,22 +16,309 @@ class DpyOBDStatus(Enum):
     def is_elm_connected(self) -> bool:
         return (False if self == DpyOBDStatus.NOT_CONNECTED else True)
     
+# ============================== # DpyOBDOverflow # ============================== #
+
+class DpyOBDOverflow(Enum):
+    DROP_OLDEST = "Drop Oldest"
+    DROP_NEWEST = "Drop Newest"
+    BLOCK = "Block" # Pids that only a full stream needs skip their turns until the consumer catches up
+
 # ============================== # DpyOBDCommands # ============================== #
 
 class DpyOBDCommands(Enum):
+    PIDS_A = "00"
     DTC = "01"
+    FREEZE_DTC = "02"
+    FUEL_STATUS = "03"
     ENGINE_LOAD = "04"
     COOLANT_TEMP = "05"
+    SHORT_FUEL_TRIM_1 = "06"
+    LONG_FUEL_TRIM_1 = "07"
+    SHORT_FUEL_TRIM_2 = "08"
+    LONG_FUEL_TRIM_2 = "09"
+    FUEL_PRESSURE = "0A"
+    INTAKE_PRESSURE = "0B"
     RPM = "0C"
     SPEED = "0D"
+    TIMING_ADVANCE = "0E"
+    INTAKE_TEMP = "0F"
+    MAF = "10"
     THROTTLE_POS = "11"
+    AIR_STATUS = "12"
+    O2_SENSORS = "13"
+    O2_B1S1 = "14"
+    O2_B1S2 = "15"
+    O2_B1S3 = "16"
+    O2_B1S4 = "17"
+    O2_B2S1 = "18"
+    O2_B2S2 = "19"
+    O2_B2S3 = "1A"
+    O2_B2S4 = "1B"
+    OBD_COMPLIANCE = "1C"
+    O2_SENSORS_ALT = "1D"
+    AUX_INPUT_STATUS = "1E"
     ENGINE_RUN_TIME = "1F"
-    INTAKE_PRESSURE = "0B"
+    PIDS_B = "20"
+    DISTANCE_W_MIL = "21"
+    FUEL_RAIL_PRESSURE_VAC = "22"
+    FUEL_RAIL_PRESSURE_DIRECT = "23"
+    O2_S1_WR_VOLTAGE = "24"
+    O2_S2_WR_VOLTAGE = "25"
+    O2_S3_WR_VOLTAGE = "26"
+    O2_S4_WR_VOLTAGE = "27"
+    O2_S5_WR_VOLTAGE = "28"
+    O2_S6_WR_VOLTAGE = "29"
+    O2_S7_WR_VOLTAGE = "2A"
+    O2_S8_WR_VOLTAGE = "2B"
+    COMMANDED_EGR = "2C"
+    EGR_ERROR = "2D"
+    EVAPORATIVE_PURGE = "2E"
+    FUEL_LEVEL = "2F"
+    WARMUPS_SINCE_DTC_CLEAR = "30"
+    DISTANCE_SINCE_DTC_CLEAR = "31"
+    EVAP_VAPOR_PRESSURE = "32"
+    BAROMETRIC_PRESSURE = "33"
+    O2_S1_WR_CURRENT = "34"
+    O2_S2_WR_CURRENT = "35"
+    O2_S3_WR_CURRENT = "36"
+    O2_S4_WR_CURRENT = "37"
+    O2_S5_WR_CURRENT = "38"
+    O2_S6_WR_CURRENT = "39"
+    O2_S7_WR_CURRENT = "3A"
+    O2_S8_WR_CURRENT = "3B"
+    CATALYST_TEMP_B1S1 = "3C"
+    CATALYST_TEMP_B2S1 = "3D"
+    CATALYST_TEMP_B1S2 = "3E"
+    CATALYST_TEMP_B2S2 = "3F"
+    PIDS_C = "40"
+    STATUS_DRIVE_CYCLE = "41"
+    CONTROL_MODULE_VOLTAGE = "42"
+    ABSOLUTE_LOAD = "43"
+    COMMANDED_EQUIV_RATIO = "44"
+    RELATIVE_THROTTLE_POS = "45"
+    AMBIENT_AIR_TEMP = "46"
+    THROTTLE_POS_B = "47"
+    THROTTLE_POS_C = "48"
+    ACCELERATOR_POS_D = "49"
+    ACCELERATOR_POS_E = "4A"
+    ACCELERATOR_POS_F = "4B"
+    THROTTLE_ACTUATOR = "4C"
+    RUN_TIME_MIL = "4D"
+    TIME_SINCE_DTC_CLEARED = "4E"
+    MAX_VALUES = "4F"
+    MAX_MAF = "50"
+    FUEL_TYPE = "51"
+    ETHANOL_PERCENT = "52"
+    EVAP_VAPOR_PRESSURE_ABS = "53"
+    EVAP_VAPOR_PRESSURE_ALT = "54"
+    SHORT_O2_TRIM_B1 = "55"
+    LONG_O2_TRIM_B1 = "56"
+    SHORT_O2_TRIM_B2 = "57"
+    LONG_O2_TRIM_B2 = "58"
+    FUEL_RAIL_PRESSURE_ABS = "59"
+    RELATIVE_ACCEL_POS = "5A"
+    HYBRID_BATTERY_REMAINING = "5B"
+    OIL_TEMP = "5C"
+    FUEL_INJECT_TIMING = "5D"
+    FUEL_RATE = "5E"
+    EMISSION_REQ = "5F"
+    PIDS_D = "60"
+    DRIVER_DEMAND_TORQUE = "61"
+    ACTUAL_TORQUE = "62"
+    REFERENCE_TORQUE = "63"
+    ENGINE_PERCENT_TORQUE = "64"
+    AUX_IO_SUPPORTED = "65"
+    MAF_SENSORS = "66"
+    COOLANT_TEMP_SENSORS = "67"
+    INTAKE_TEMP_SENSORS = "68"
+    EGR_CONTROL = "69"
+    DIESEL_INTAKE_AIR_FLOW = "6A"
+    EGR_TEMP = "6B"
+    THROTTLE_ACTUATOR_CONTROL = "6C"
+    FUEL_PRESSURE_CONTROL = "6D"
+    INJECTION_PRESSURE_CONTROL = "6E"
+    TURBO_INLET_PRESSURE = "6F"
+    BOOST_PRESSURE_CONTROL = "70"
+    VGT_CONTROL = "71"
+    WASTEGATE_CONTROL = "72"
+    EXHAUST_PRESSURE = "73"
+    TURBO_RPM = "74"
+    TURBO_TEMP_A = "75"
+    TURBO_TEMP_B = "76"
+    CHARGE_AIR_COOLER_TEMP = "77"
+    EGT_BANK_1 = "78"
+    EGT_BANK_2 = "79"
+    DPF_BANK_1 = "7A"
+    DPF_BANK_2 = "7B"
+    DPF_TEMP = "7C"
+    NOX_NTE_STATUS = "7D"
+    PM_NTE_STATUS = "7E"
+    ENGINE_RUN_TIMES = "7F"
+    PIDS_E = "80"
+    AECD_RUN_TIME_1 = "81"
+    AECD_RUN_TIME_2 = "82"
+    NOX_SENSOR = "83"
+    MANIFOLD_SURFACE_TEMP = "84"
+    NOX_REAGENT_SYSTEM = "85"
+    PM_SENSOR = "86"
+    INTAKE_PRESSURE_SENSORS = "87"
+    SCR_INDUCE_SYSTEM = "88"
+    AECD_RUN_TIME_3 = "89"
+    AECD_RUN_TIME_4 = "8A"
+    DIESEL_AFTERTREATMENT = "8B"
+    O2_SENSORS_WIDE_RANGE = "8C"
+    THROTTLE_POS_G = "8D"
+    ENGINE_FRICTION_TORQUE = "8E"
+    PM_SENSOR_BANKS = "8F"
+    WWH_OBD_SYSTEM_INFO = "90"
+    WWH_OBD_ECU_INFO = "91"
+    FUEL_SYSTEM_CONTROL = "92"
+    WWH_OBD_COUNTERS = "93"
+    NOX_WARNING_SYSTEM = "94"
+    EGT_SENSORS_1 = "98"
+    EGT_SENSORS_2 = "99"
+    HYBRID_BATTERY_VOLTAGE = "9A"
+    DEF_SENSOR = "9B"
+    O2_SENSOR_DATA = "9C"
+    ENGINE_FUEL_RATE = "9D"
+    EXHAUST_FLOW_RATE = "9E"
+    FUEL_SYSTEM_USE = "9F"
+    PIDS_F = "A0"
+    NOX_SENSOR_CORRECTED = "A1"
+    CYLINDER_FUEL_RATE = "A2"
+    EVAP_PRESSURE_SENSORS = "A3"
+    TRANSMISSION_GEAR = "A4"
+    DEF_DOSING = "A5"
+    ODOMETER = "A6"
+    NOX_SENSOR_3_4 = "A7"
+    NOX_SENSOR_CORRECTED_3_4 = "A8"
+    ABS_DISABLE_SWITCH = "A9"
+    PIDS_G = "C0"
+
+# ============================== # DpyOBDPid # ============================== #
+
+class DpyOBDFormulas():
+    # Formulas only use arithmetic so that they work on single bytes and on NumPy byte columns alike
+    @staticmethod
+    def raw(*data):
+        value = 0
+        for byte in data:
+            value = value * 256 + byte
+        return value
+
+    @staticmethod
+    def raw_bytes(*data):
+        # Layouts longer than 4 bytes that mix bit fields with values, one raw integer per byte
+        return tuple(data)
+
+    @staticmethod
+    def byte(A):
+        return A
+
+    @staticmethod
+    def word(A, B):
+        return 256 * A + B
+
+    @staticmethod
+    def signed_word(A, B):
+        return ((256 * A + B) ^ 0x8000) - 0x8000
+
+    @staticmethod
+    def percent(A):
+        return A / 2.55
+
+    @staticmethod
+    def temperature(A):
+        return A - 40
+
+    @staticmethod
+    def fuel_trim(A):
+        return A / 1.28 - 100
+
+    @staticmethod
+    def torque(A):
+        return A - 125
+
+    @staticmethod
+    def catalyst_temperature(A, B):
+        return (256 * A + B) / 10 - 40
+
+    @staticmethod
+    def o2_voltage_trim(A, B):
+        return (A / 200, B / 1.28 - 100)
+
+    @staticmethod
+    def wide_o2_voltage(A, B, C, D):
+        return ((256 * A + B) * 2 / 65536, (256 * C + D) * 8 / 65536)
+
+    @staticmethod
+    def wide_o2_current(A, B, C, D):
+        return ((256 * A + B) * 2 / 65536, (256 * C + D) / 256 - 128)
+
+    # Multi sensor pids start with a byte of support bits, which is kept as the first value, followed by one field per sensor
+    @staticmethod
+    def sensor_bytes(formula: Callable) -> Callable:
+        return lambda A, *data: (A,) + tuple(formula(byte) for byte in data)
+
+    @staticmethod
+    def sensor_words(formula: Callable) -> Callable:
+        return lambda A, *data: (A,) + tuple(formula(256 * data[i] + data[i + 1]) for i in range(0, len(data), 2))
+
+    @staticmethod
+    def sensor_double_words(A, *data):
+        return (A,) + tuple(DpyOBDFormulas.raw(*data[i:i + 4]) for i in range(0, len(data), 4))
+
+class DpyOBDPid(NamedTuple):
+    length: int # Byte count of the payload
+    formula: Callable
+    unit: Optional[str]
+    minimum: Optional[float]
+    maximum: Optional[float]
+
+    @property
+    def value_count(self) -> int:
+        # Formulas are plain arithmetic, so the shape of a decoded value does not depend on the bytes
+        value = self.formula(*[0] * self.length)
+        return len(value) if isinstance(value, tuple) else 1
+
+# ============================== # DpyOBDSample # ============================== #
+
+class DpyOBDSample(NamedTuple):
+    timestamp: float # Unix time of the response
+    pid: DpyOBDCommands
+    value: Any # Decoded value
+    raw: bytes # Payload bytes of the response
+
+# ============================== # DpyOBDAggregate # ============================== #
+
+class DpyOBDAggregate(NamedTuple):
+    pid: DpyOBDCommands
+    start: float # Unix time where the window starts
+    end: float
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+    last: float
+
+# ============================== # DpyOBDDtcChange # ============================== #
+
+class DpyOBDDtcChange(NamedTuple):
+    mode: str # "03" stored, "07" pending or "0A" permanent codes
+    added: FrozenSet[str]
+    cleared: FrozenSet[str]
+
+# ============================== # DpyOBDFleetSample # ============================== #
+
+class DpyOBDFleetSample(NamedTuple):
+    adapter: str # Name of the adapter in the fleet
+    sample: DpyOBDSample
 
 # ============================== # DpyOBData # ============================== #
 
 class DpyOBData():
     MOST_USED_BAUDRATES = [9600, 10400, 38400, 50000, 115200]
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".dpyobd", "cache.json")
     COMMANDS = DpyOBDCommands
     PROTOCOLS = {
         "0": "AUTO",
@@ -44,6 +333,182 @@ class DpyOBData():
         "9": "ISO 15765-4 (CAN 29/250)",
         "A": "SAE J1939 (CAN 29/250)"
     }
+    ELM_INFO_MESSAGES = ["SEARCHING...", "BUS INIT", "STOPPED"] # Progress lines that ELM prints before the actual response
+    ELM_BUS_ERROR_MESSAGES = ["UNABLE TO CONNECT", "CAN ERROR", "BUS ERROR", "BUS BUSY", "FB ERROR", "DATA ERROR", "LV RESET"]
+    CAN_PROTOCOLS = ["6", "7", "8", "9"]
+    MAX_PIDS_PER_REQUEST = 6 # ISO 15765-4 allows up to 6 pids in one mode 01 request
+    DTC_MODES = {"03": "stored", "07": "pending", "0A": "permanent"}
+    DTC_CATEGORIES = ["P", "C", "B", "U"] # Powertrain, chassis, body, network by the first two bits of a code
+    PIDS = { # SAE J1979 mode 01 decoding table, bit encoded pids are decoded as raw integers
+        DpyOBDCommands.PIDS_A: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.DTC: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.FREEZE_DTC: DpyOBDPid(2, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.FUEL_STATUS: DpyOBDPid(2, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.ENGINE_LOAD: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.COOLANT_TEMP: DpyOBDPid(1, DpyOBDFormulas.temperature, "°C", -40, 215),
+        DpyOBDCommands.SHORT_FUEL_TRIM_1: DpyOBDPid(1, DpyOBDFormulas.fuel_trim, "%", -100, 99.2),
+        DpyOBDCommands.LONG_FUEL_TRIM_1: DpyOBDPid(1, DpyOBDFormulas.fuel_trim, "%", -100, 99.2),
+        DpyOBDCommands.SHORT_FUEL_TRIM_2: DpyOBDPid(1, DpyOBDFormulas.fuel_trim, "%", -100, 99.2),
+        DpyOBDCommands.LONG_FUEL_TRIM_2: DpyOBDPid(1, DpyOBDFormulas.fuel_trim, "%", -100, 99.2),
+        DpyOBDCommands.FUEL_PRESSURE: DpyOBDPid(1, lambda A: 3 * A, "kPa", 0, 765),
+        DpyOBDCommands.INTAKE_PRESSURE: DpyOBDPid(1, DpyOBDFormulas.byte, "kPa", 0, 255),
+        DpyOBDCommands.RPM: DpyOBDPid(2, lambda A, B: (256 * A + B) / 4, "rpm", 0, 16383.75),
+        DpyOBDCommands.SPEED: DpyOBDPid(1, DpyOBDFormulas.byte, "km/h", 0, 255),
+        DpyOBDCommands.TIMING_ADVANCE: DpyOBDPid(1, lambda A: A / 2 - 64, "°", -64, 63.5),
+        DpyOBDCommands.INTAKE_TEMP: DpyOBDPid(1, DpyOBDFormulas.temperature, "°C", -40, 215),
+        DpyOBDCommands.MAF: DpyOBDPid(2, lambda A, B: (256 * A + B) / 100, "g/s", 0, 655.35),
+        DpyOBDCommands.THROTTLE_POS: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.AIR_STATUS: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.O2_SENSORS: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.O2_B1S1: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B1S2: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B1S3: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B1S4: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B2S1: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B2S2: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B2S3: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.O2_B2S4: DpyOBDPid(2, DpyOBDFormulas.o2_voltage_trim, "V, %", None, None),
+        DpyOBDCommands.OBD_COMPLIANCE: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.O2_SENSORS_ALT: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.AUX_INPUT_STATUS: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.ENGINE_RUN_TIME: DpyOBDPid(2, DpyOBDFormulas.word, "s", 0, 65535),
+        DpyOBDCommands.PIDS_B: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.DISTANCE_W_MIL: DpyOBDPid(2, DpyOBDFormulas.word, "km", 0, 65535),
+        DpyOBDCommands.FUEL_RAIL_PRESSURE_VAC: DpyOBDPid(2, lambda A, B: 0.079 * (256 * A + B), "kPa", 0, 5177.265),
+        DpyOBDCommands.FUEL_RAIL_PRESSURE_DIRECT: DpyOBDPid(2, lambda A, B: 10 * (256 * A + B), "kPa", 0, 655350),
+        DpyOBDCommands.O2_S1_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S2_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S3_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S4_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S5_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S6_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S7_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.O2_S8_WR_VOLTAGE: DpyOBDPid(4, DpyOBDFormulas.wide_o2_voltage, "ratio, V", None, None),
+        DpyOBDCommands.COMMANDED_EGR: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.EGR_ERROR: DpyOBDPid(1, DpyOBDFormulas.fuel_trim, "%", -100, 99.2),
+        DpyOBDCommands.EVAPORATIVE_PURGE: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.FUEL_LEVEL: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.WARMUPS_SINCE_DTC_CLEAR: DpyOBDPid(1, DpyOBDFormulas.byte, "count", 0, 255),
+        DpyOBDCommands.DISTANCE_SINCE_DTC_CLEAR: DpyOBDPid(2, DpyOBDFormulas.word, "km", 0, 65535),
+        DpyOBDCommands.EVAP_VAPOR_PRESSURE: DpyOBDPid(2, lambda A, B: DpyOBDFormulas.signed_word(A, B) / 4, "Pa", -8192, 8191.75),
+        DpyOBDCommands.BAROMETRIC_PRESSURE: DpyOBDPid(1, DpyOBDFormulas.byte, "kPa", 0, 255),
+        DpyOBDCommands.O2_S1_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S2_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S3_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S4_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S5_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S6_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S7_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.O2_S8_WR_CURRENT: DpyOBDPid(4, DpyOBDFormulas.wide_o2_current, "ratio, mA", None, None),
+        DpyOBDCommands.CATALYST_TEMP_B1S1: DpyOBDPid(2, DpyOBDFormulas.catalyst_temperature, "°C", -40, 6513.5),
+        DpyOBDCommands.CATALYST_TEMP_B2S1: DpyOBDPid(2, DpyOBDFormulas.catalyst_temperature, "°C", -40, 6513.5),
+        DpyOBDCommands.CATALYST_TEMP_B1S2: DpyOBDPid(2, DpyOBDFormulas.catalyst_temperature, "°C", -40, 6513.5),
+        DpyOBDCommands.CATALYST_TEMP_B2S2: DpyOBDPid(2, DpyOBDFormulas.catalyst_temperature, "°C", -40, 6513.5),
+        DpyOBDCommands.PIDS_C: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.STATUS_DRIVE_CYCLE: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.CONTROL_MODULE_VOLTAGE: DpyOBDPid(2, lambda A, B: (256 * A + B) / 1000, "V", 0, 65.535),
+        DpyOBDCommands.ABSOLUTE_LOAD: DpyOBDPid(2, lambda A, B: (256 * A + B) / 2.55, "%", 0, 25700),
+        DpyOBDCommands.COMMANDED_EQUIV_RATIO: DpyOBDPid(2, lambda A, B: (256 * A + B) * 2 / 65536, "ratio", 0, 2),
+        DpyOBDCommands.RELATIVE_THROTTLE_POS: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.AMBIENT_AIR_TEMP: DpyOBDPid(1, DpyOBDFormulas.temperature, "°C", -40, 215),
+        DpyOBDCommands.THROTTLE_POS_B: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.THROTTLE_POS_C: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.ACCELERATOR_POS_D: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.ACCELERATOR_POS_E: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.ACCELERATOR_POS_F: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.THROTTLE_ACTUATOR: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.RUN_TIME_MIL: DpyOBDPid(2, DpyOBDFormulas.word, "min", 0, 65535),
+        DpyOBDCommands.TIME_SINCE_DTC_CLEARED: DpyOBDPid(2, DpyOBDFormulas.word, "min", 0, 65535),
+        DpyOBDCommands.MAX_VALUES: DpyOBDPid(4, lambda A, B, C, D: (A, B, C, 10 * D), "ratio, V, mA, kPa", None, None),
+        DpyOBDCommands.MAX_MAF: DpyOBDPid(4, lambda A, B, C, D: 10 * A, "g/s", 0, 2550),
+        DpyOBDCommands.FUEL_TYPE: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.ETHANOL_PERCENT: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.EVAP_VAPOR_PRESSURE_ABS: DpyOBDPid(2, lambda A, B: (256 * A + B) / 200, "kPa", 0, 327.675),
+        DpyOBDCommands.EVAP_VAPOR_PRESSURE_ALT: DpyOBDPid(2, DpyOBDFormulas.signed_word, "Pa", -32768, 32767),
+        DpyOBDCommands.SHORT_O2_TRIM_B1: DpyOBDPid(2, lambda A, B: (A / 1.28 - 100, B / 1.28 - 100), "%", -100, 99.2),
+        DpyOBDCommands.LONG_O2_TRIM_B1: DpyOBDPid(2, lambda A, B: (A / 1.28 - 100, B / 1.28 - 100), "%", -100, 99.2),
+        DpyOBDCommands.SHORT_O2_TRIM_B2: DpyOBDPid(2, lambda A, B: (A / 1.28 - 100, B / 1.28 - 100), "%", -100, 99.2),
+        DpyOBDCommands.LONG_O2_TRIM_B2: DpyOBDPid(2, lambda A, B: (A / 1.28 - 100, B / 1.28 - 100), "%", -100, 99.2),
+        DpyOBDCommands.FUEL_RAIL_PRESSURE_ABS: DpyOBDPid(2, lambda A, B: 10 * (256 * A + B), "kPa", 0, 655350),
+        DpyOBDCommands.RELATIVE_ACCEL_POS: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.HYBRID_BATTERY_REMAINING: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.OIL_TEMP: DpyOBDPid(1, DpyOBDFormulas.temperature, "°C", -40, 210),
+        DpyOBDCommands.FUEL_INJECT_TIMING: DpyOBDPid(2, lambda A, B: (256 * A + B) / 128 - 210, "°", -210, 301.992),
+        DpyOBDCommands.FUEL_RATE: DpyOBDPid(2, lambda A, B: (256 * A + B) / 20, "L/h", 0, 3212.75),
+        DpyOBDCommands.EMISSION_REQ: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.PIDS_D: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.DRIVER_DEMAND_TORQUE: DpyOBDPid(1, DpyOBDFormulas.torque, "%", -125, 130),
+        DpyOBDCommands.ACTUAL_TORQUE: DpyOBDPid(1, DpyOBDFormulas.torque, "%", -125, 130),
+        DpyOBDCommands.REFERENCE_TORQUE: DpyOBDPid(2, DpyOBDFormulas.word, "Nm", 0, 65535),
+        DpyOBDCommands.ENGINE_PERCENT_TORQUE: DpyOBDPid(5, lambda A, B, C, D, E: (A - 125, B - 125, C - 125, D - 125, E - 125), "%", -125, 130),
+        DpyOBDCommands.AUX_IO_SUPPORTED: DpyOBDPid(2, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.MAF_SENSORS: DpyOBDPid(5, DpyOBDFormulas.sensor_words(lambda W: W / 32), "g/s", 0, 2047.96875),
+        DpyOBDCommands.COOLANT_TEMP_SENSORS: DpyOBDPid(3, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.temperature), "°C", -40, 215),
+        DpyOBDCommands.INTAKE_TEMP_SENSORS: DpyOBDPid(7, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.temperature), "°C", -40, 215),
+        DpyOBDCommands.EGR_CONTROL: DpyOBDPid(7, lambda A, B, C, D, E, F, G: (A, B / 2.55, C / 2.55, D / 1.28 - 100, E / 2.55, F / 2.55, G / 1.28 - 100), "%", -100, 100),
+        DpyOBDCommands.DIESEL_INTAKE_AIR_FLOW: DpyOBDPid(5, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.percent), "%", 0, 100),
+        DpyOBDCommands.EGR_TEMP: DpyOBDPid(5, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.temperature), "°C", -40, 215),
+        DpyOBDCommands.THROTTLE_ACTUATOR_CONTROL: DpyOBDPid(5, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.percent), "%", 0, 100),
+        DpyOBDCommands.FUEL_PRESSURE_CONTROL: DpyOBDPid(11, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.INJECTION_PRESSURE_CONTROL: DpyOBDPid(9, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.TURBO_INLET_PRESSURE: DpyOBDPid(3, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.byte), "kPa", 0, 255),
+        DpyOBDCommands.BOOST_PRESSURE_CONTROL: DpyOBDPid(10, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.VGT_CONTROL: DpyOBDPid(6, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.WASTEGATE_CONTROL: DpyOBDPid(5, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.percent), "%", 0, 100),
+        DpyOBDCommands.EXHAUST_PRESSURE: DpyOBDPid(5, DpyOBDFormulas.sensor_words(lambda W: W / 100), "kPa", 0, 655.35),
+        DpyOBDCommands.TURBO_RPM: DpyOBDPid(5, DpyOBDFormulas.sensor_words(DpyOBDFormulas.byte), "rpm", 0, 65535),
+        DpyOBDCommands.TURBO_TEMP_A: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.TURBO_TEMP_B: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.CHARGE_AIR_COOLER_TEMP: DpyOBDPid(5, DpyOBDFormulas.sensor_bytes(DpyOBDFormulas.temperature), "°C", -40, 215),
+        DpyOBDCommands.EGT_BANK_1: DpyOBDPid(9, DpyOBDFormulas.sensor_words(lambda W: W / 10 - 40), "°C", -40, 6513.5),
+        DpyOBDCommands.EGT_BANK_2: DpyOBDPid(9, DpyOBDFormulas.sensor_words(lambda W: W / 10 - 40), "°C", -40, 6513.5),
+        DpyOBDCommands.DPF_BANK_1: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.DPF_BANK_2: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.DPF_TEMP: DpyOBDPid(9, DpyOBDFormulas.sensor_words(lambda W: W / 10 - 40), "°C", -40, 6513.5),
+        DpyOBDCommands.NOX_NTE_STATUS: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.PM_NTE_STATUS: DpyOBDPid(1, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.ENGINE_RUN_TIMES: DpyOBDPid(13, DpyOBDFormulas.sensor_double_words, "s", 0, 4294967295), # Total, idle and PTO
+        DpyOBDCommands.PIDS_E: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.AECD_RUN_TIME_1: DpyOBDPid(41, DpyOBDFormulas.sensor_double_words, "s", 0, 4294967295), # Two timers per AECD
+        DpyOBDCommands.AECD_RUN_TIME_2: DpyOBDPid(41, DpyOBDFormulas.sensor_double_words, "s", 0, 4294967295),
+        DpyOBDCommands.NOX_SENSOR: DpyOBDPid(9, DpyOBDFormulas.sensor_words(DpyOBDFormulas.byte), "ppm", 0, 65535),
+        DpyOBDCommands.MANIFOLD_SURFACE_TEMP: DpyOBDPid(1, DpyOBDFormulas.temperature, "°C", -40, 215),
+        DpyOBDCommands.NOX_REAGENT_SYSTEM: DpyOBDPid(10, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.PM_SENSOR: DpyOBDPid(5, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.INTAKE_PRESSURE_SENSORS: DpyOBDPid(5, DpyOBDFormulas.sensor_words(lambda W: W / 32), "kPa", 0, 2047.96875),
+        DpyOBDCommands.SCR_INDUCE_SYSTEM: DpyOBDPid(13, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.AECD_RUN_TIME_3: DpyOBDPid(41, DpyOBDFormulas.sensor_double_words, "s", 0, 4294967295),
+        DpyOBDCommands.AECD_RUN_TIME_4: DpyOBDPid(41, DpyOBDFormulas.sensor_double_words, "s", 0, 4294967295),
+        DpyOBDCommands.DIESEL_AFTERTREATMENT: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.O2_SENSORS_WIDE_RANGE: DpyOBDPid(17, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.THROTTLE_POS_G: DpyOBDPid(1, DpyOBDFormulas.percent, "%", 0, 100),
+        DpyOBDCommands.ENGINE_FRICTION_TORQUE: DpyOBDPid(1, DpyOBDFormulas.torque, "%", -125, 130),
+        DpyOBDCommands.PM_SENSOR_BANKS: DpyOBDPid(7, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.WWH_OBD_SYSTEM_INFO: DpyOBDPid(3, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.WWH_OBD_ECU_INFO: DpyOBDPid(5, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.FUEL_SYSTEM_CONTROL: DpyOBDPid(2, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.WWH_OBD_COUNTERS: DpyOBDPid(3, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.NOX_WARNING_SYSTEM: DpyOBDPid(12, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.EGT_SENSORS_1: DpyOBDPid(9, DpyOBDFormulas.sensor_words(lambda W: W / 10 - 40), "°C", -40, 6513.5),
+        DpyOBDCommands.EGT_SENSORS_2: DpyOBDPid(9, DpyOBDFormulas.sensor_words(lambda W: W / 10 - 40), "°C", -40, 6513.5),
+        DpyOBDCommands.HYBRID_BATTERY_VOLTAGE: DpyOBDPid(6, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.DEF_SENSOR: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.O2_SENSOR_DATA: DpyOBDPid(17, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.ENGINE_FUEL_RATE: DpyOBDPid(4, lambda A, B, C, D: ((256 * A + B) / 50, (256 * C + D) / 50), "g/s", 0, 1310.7), # Engine, vehicle
+        DpyOBDCommands.EXHAUST_FLOW_RATE: DpyOBDPid(2, lambda A, B: (256 * A + B) / 5, "kg/h", 0, 13107),
+        DpyOBDCommands.FUEL_SYSTEM_USE: DpyOBDPid(9, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.PIDS_F: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.NOX_SENSOR_CORRECTED: DpyOBDPid(9, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.CYLINDER_FUEL_RATE: DpyOBDPid(2, lambda A, B: (256 * A + B) / 32, "mg/stroke", 0, 2047.96875),
+        DpyOBDCommands.EVAP_PRESSURE_SENSORS: DpyOBDPid(9, DpyOBDFormulas.raw_bytes, None, None, None),
+        DpyOBDCommands.TRANSMISSION_GEAR: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.DEF_DOSING: DpyOBDPid(4, lambda A, B, C, D: B / 2, "%", 0, 127.5),
+        DpyOBDCommands.ODOMETER: DpyOBDPid(4, lambda A, B, C, D: DpyOBDFormulas.raw(A, B, C, D) / 10, "km", 0, 429496729.5),
+        DpyOBDCommands.NOX_SENSOR_3_4: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.NOX_SENSOR_CORRECTED_3_4: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.ABS_DISABLE_SWITCH: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+        DpyOBDCommands.PIDS_G: DpyOBDPid(4, DpyOBDFormulas.raw, None, None, None),
+    }
     
 # ============================== # Exceptions # ============================== #
 
@@ -0,0 +1,166 @@
+import os
+import struct
+from typing import Dict, Optional, Tuple
+from dpyothers import DpyOBData, DpyOBDSample, ParserError
+
+try:
+    import numpy as np
+except ImportError: # Only reading a recording needs NumPy
+    np = None
+
+# A recording is a directory with one column file per pid, "<pid code>.bin". Every column file is a HEADER
+# followed by fixed width records in time order: timestamp, every decoded value of the pid and its raw bytes.
+# A pid always decodes to the same number of values, so a column is a strided view on its mapped file.
+MAGIC = b"DPYOBDR2"
+HEADER = struct.Struct("<8sBBHI") # magic, pid, value count, raw size, record size
+COLUMN_SUFFIX = ".bin"
+
+def _record_struct(pid: DpyOBData.COMMANDS) -> struct.Struct:
+    pid_data = DpyOBData.PIDS[pid]
+    return struct.Struct(f"<d{pid_data.value_count}d{pid_data.length}s")
+
+def _record_dtype(pid: DpyOBData.COMMANDS) -> "np.dtype":
+    pid_data = DpyOBData.PIDS[pid]
+    return np.dtype([("timestamp", "<f8"), ("values", "<f8", (pid_data.value_count,)), ("raw", "u1", (pid_data.length,))])
+
+def _column_path(path: str, pid: DpyOBData.COMMANDS) -> str:
+    return os.path.join(path, pid.value + COLUMN_SUFFIX)
+
+def _read_header(path: str, pid: DpyOBData.COMMANDS, record_size: int) -> None:
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ParserError(f"{path} is not a compatible recording column")
+    magic, pid_code, _, _, size = HEADER.unpack(header)
+    if magic != MAGIC or pid_code != int(pid.value, 16) or size != record_size:
+        raise ParserError(f"{path} is not a compatible recording column")
+
+# ============================== # DpyOBDRecorder # ============================== #
+
+class DpyOBDRecorder():
+    FLUSH_INTERVAL = 256
+
+    def __init__(self, path: str) -> None:
+        if os.path.exists(path) and not os.path.isdir(path):
+            raise ParserError(f"{path} is not a recording directory")
+        os.makedirs(path, exist_ok=True)
+        self.__path = path
+        self.__columns: Dict[DpyOBData.COMMANDS, Tuple] = dict() # pid -> (file, record struct, value count, buffer)
+        self.__last_timestamps: Dict[DpyOBData.COMMANDS, float] = dict()
+        self.__record_count = 0
+        self.__buffered_count = 0
+
+    def record(self, sample: DpyOBDSample) -> None:
+        if sample.pid not in DpyOBData.PIDS:
+            return
+        column = self.__columns.get(sample.pid)
+        if column is None:
+            column = self.__open_column(sample.pid)
+        _, record, value_count, buffer = column
+        # Time range queries binary search the timestamps, so they are never allowed to go back
+        timestamp = max(sample.timestamp, self.__last_timestamps.get(sample.pid, float("-inf")))
+        self.__last_timestamps[sample.pid] = timestamp
+        values = sample.value if isinstance(sample.value, tuple) else (sample.value,)
+        if len(values) != value_count or any(not isinstance(value, (int, float)) for value in values):
+            values = (float("nan"),) * value_count # Not decoded, the raw bytes are still kept
+        buffer += record.pack(timestamp, *values, sample.raw)
+        self.__record_count += 1
+        self.__buffered_count += 1
+        if self.__buffered_count >= DpyOBDRecorder.FLUSH_INTERVAL:
+            self.flush()
+
+    def __open_column(self, pid: DpyOBData.COMMANDS) -> Tuple:
+        path = _column_path(self.__path, pid)
+        record = _record_struct(pid)
+        pid_data = DpyOBData.PIDS[pid]
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            _read_header(path, pid, record.size)
+            file = open(path, "r+b")
+            record_count = (os.path.getsize(path) - HEADER.size) // record.size
+            file.truncate(HEADER.size + record_count * record.size) # Drop a record cut off by a crash
+            if record_count > 0:
+                file.seek(HEADER.size + (record_count - 1) * record.size)
+                self.__last_timestamps[pid] = struct.unpack("<d", file.read(8))[0]
+            file.seek(0, os.SEEK_END)
+        else:
+            file = open(path, "wb")
+            file.write(HEADER.pack(MAGIC, int(pid.value, 16), pid_data.value_count, pid_data.length, record.size))
+        column = (file, record, pid_data.value_count, bytearray())
+        self.__columns[pid] = column
+        return column
+
+    def flush(self) -> None:
+        for file, _, _, buffer in self.__columns.values():
+            if buffer:
+                file.write(buffer)
+                buffer.clear()
+            file.flush()
+        self.__buffered_count = 0
+
+    def close(self) -> None:
+        self.flush()
+        for file, _, _, _ in self.__columns.values():
+            file.close()
+        self.__columns.clear()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def record_count(self) -> int:
+        return self.__record_count
+
+# ============================== # DpyOBDRecording # ============================== #
+
+class DpyOBDRecording():
+    def __init__(self, path: str) -> None:
+        if np is None:
+            raise ParserError("NumPy is required for reading recordings")
+        if not os.path.isdir(path):
+            raise ParserError(f"{path} is not a recording directory")
+        self.__columns: Dict[DpyOBData.COMMANDS, "np.ndarray"] = dict()
+        for pid in DpyOBData.PIDS:
+            column_path = _column_path(path, pid)
+            if not os.path.exists(column_path):
+                continue
+            dtype = _record_dtype(pid)
+            _read_header(column_path, pid, dtype.itemsize)
+            record_count = (os.path.getsize(column_path) - HEADER.size) // dtype.itemsize
+            if record_count > 0:
+                self.__columns[pid] = np.memmap(column_path, dtype=dtype, mode="r", offset=HEADER.size, shape=(record_count,))
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self.__columns.values())
+
+    @property
+    def pids(self) -> Tuple:
+        return tuple(self.__columns)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[DpyOBData.COMMANDS, "np.ndarray"]:
+        # pid -> records between start and end, views on the mapped files, no records are copied
+        records = {pid: self.__slice(pid, start, end) for pid in self.__columns}
+        return {pid: pid_records for pid, pid_records in records.items() if len(pid_records)}
+
+    def column(self, pid, start: Optional[float] = None, end: Optional[float] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        # Values are one dimensional for single value pids and have a column per value otherwise, both are views
+        records = self.__slice(pid, start, end)
+        values = records["values"]
+        return records["timestamp"], values[:, 0] if values.shape[1] == 1 else values
+
+    def raw(self, pid, start: Optional[float] = None, end: Optional[float] = None) -> "np.ndarray":
+        return self.__slice(pid, start, end)["raw"]
+
+    def __slice(self, pid, start: Optional[float], end: Optional[float]) -> "np.ndarray":
+        records = self.__columns.get(pid)
+        if records is None:
+            return np.empty(0, dtype=_record_dtype(pid))
+        # The timestamps of a column are sorted, the binary search only touches the pages it probes
+        timestamps = records["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(records) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        return records[first:last]
+
+    def close(self) -> None:
+        # The files stay mapped until the views returned by query, column and raw are released too
+        self.__columns = dict()
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Hashable, List, Optional
+
+class DpyOBDScheduler():
+    SMOOTHING = 0.2 # Weight of the newest measurement in the round trip averages
+    AGING_INTERVAL = 1.0 # Seconds past its deadline that raise a key by one priority, so an overloaded link slows keys down instead of silencing them
+
+    def __init__(self) -> None:
+        self.__entries: Dict[Hashable, List[Any]] = dict() # key -> [period, priority, deadline]
+        self.__round_trip = 0.0
+        self.__keys_per_request = 1.0
+
+    def add(self, key: Hashable, rate: float, priority: int, now: float) -> None:
+        self.__entries[key] = [1 / rate, priority, now]
+
+    def update(self, key: Hashable, rate: float, priority: int) -> None:
+        # Keeps the deadline, a faster rate takes effect from the next turn on
+        entry = self.__entries[key]
+        if rate > 1 / entry[0]:
+            entry[2] -= entry[0] - 1 / rate
+        entry[0] = 1 / rate
+        entry[1] = priority
+
+    def remove(self, key: Hashable) -> bool:
+        return self.__entries.pop(key, None) is not None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def rate(self, key: Hashable) -> float:
+        return 1 / self.__entries[key][0]
+
+    def priority(self, key: Hashable) -> int:
+        return self.__entries[key][1]
+
+    def next_deadline(self) -> Optional[float]:
+        if not self.__entries:
+            return None
+        return min(entry[2] for entry in self.__entries.values())
+
+    def due(self, now: float) -> List[Hashable]:
+        # Higher aged priority first, earliest deadline first within the same one
+        due_keys = [key for key, entry in self.__entries.items() if entry[2] <= now]
+        due_keys.sort(key=lambda key: (-self.__aged_priority(self.__entries[key], now), self.__entries[key][2]))
+        return due_keys
+
+    def __aged_priority(self, entry: List[Any], now: float) -> float:
+        return entry[1] + (now - entry[2]) / DpyOBDScheduler.AGING_INTERVAL
+
+    def complete(self, key: Hashable, now: float) -> None:
+        entry = self.__entries.get(key)
+        if entry is None: # Removed while it was being dispatched
+            return
+        # A late entry is not allowed to build up a burst of missed deadlines
+        entry[2] = max(entry[2] + entry[0], now)
+
+    def record_request(self, duration: float, key_count: int) -> None:
+        if self.__round_trip == 0.0:
+            self.__round_trip = duration
+            self.__keys_per_request = key_count
+        else:
+            self.__round_trip += DpyOBDScheduler.SMOOTHING * (duration - self.__round_trip)
+            self.__keys_per_request += DpyOBDScheduler.SMOOTHING * (key_count - self.__keys_per_request)
+
+    @property
+    def round_trip(self) -> float:
+        return self.__round_trip
+
+    @property
+    def load(self) -> float:
+        # Fraction of the link time that the requested rates need, above 1.0 they cannot be delivered
+        requested_rate = sum(1 / entry[0] for entry in self.__entries.values())
+        return requested_rate * self.__round_trip / self.__keys_per_request
+
+    @property
+    def is_overloaded(self) -> bool:
+        return self.load > 1.0
@@ -0,0 +1,173 @@
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional
+from dpyothers import DpyOBData, DpyOBDSample, ParserError
+
+# Memory layout: HEADER, LATEST_COUNT latest value SLOTs indexed by pid, then a ring of capacity SLOTs.
+# One writer, any number of readers and no locks: the writer makes the sequence number of a slot odd
+# while it changes the slot, readers retry or skip a slot whose sequence number was odd or changed meanwhile.
+MAGIC = b"DPYOBDS1"
+HEADER = struct.Struct("<8sIIIIQ") # magic, slot size, latest count, capacity, padding, published sample count
+
+MAX_VALUES = max(pid_data.value_count for pid_data in DpyOBData.PIDS.values()) # Most values that one pid of the table decodes to, at most 64 for the integer value mask
+RAW_SIZE = max(pid_data.length for pid_data in DpyOBData.PIDS.values())
+SEQUENCE = struct.Struct("<Q")
+SLOT = struct.Struct(f"<QdBBQB{RAW_SIZE}s{MAX_VALUES}d") # sequence, timestamp, pid, value count, integer value mask, raw length, raw bytes, values
+SLOT = struct.Struct(SLOT.format + f"{-SLOT.size % 8}x") # Slots stay 8 byte aligned
+LATEST_COUNT = 256 # Every mode 01 pid has a slot
+READ_RETRIES = 16
+_created_names = set() # Blocks of the writers in this process, the resource tracker knows them already
+
+def _pack_values(value) -> tuple:
+    values = value if isinstance(value, tuple) else (value,)
+    integer_mask = 0
+    for index, item in enumerate(values):
+        if isinstance(item, int):
+            integer_mask |= 1 << index
+    return len(values), integer_mask, tuple(float(item) for item in values) + (0.0,) * (MAX_VALUES - len(values))
+
+def _unpack_sample(fields: tuple) -> DpyOBDSample:
+    _, timestamp, pid_code, value_count, integer_mask, raw_length, raw = fields[:7]
+    values = tuple(int(item) if integer_mask & (1 << index) else item for index, item in enumerate(fields[7:7 + value_count]))
+    return DpyOBDSample(timestamp, DpyOBData.COMMANDS(f"{pid_code:02X}"), values[0] if value_count == 1 else values, raw[:raw_length])
+
+# ============================== # DpyOBDSampleBus # ============================== #
+
+class DpyOBDSampleBus():
+    DEFAULT_CAPACITY = 4096
+
+    def __init__(self, name: Optional[str] = None, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        size = HEADER.size + (LATEST_COUNT + capacity) * SLOT.size
+        self.__memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created_names.add(self.__memory.name)
+        self.__buffer = self.__memory.buf
+        self.__capacity = capacity
+        self.__ring_offset = HEADER.size + LATEST_COUNT * SLOT.size
+        self.__published = 0
+        self.__skipped = 0
+        self.__latest_sequences = [0] * LATEST_COUNT
+        HEADER.pack_into(self.__buffer, 0, MAGIC, SLOT.size, LATEST_COUNT, capacity, 0, 0)
+
+    def publish(self, sample: DpyOBDSample) -> None:
+        if sample.value is None:
+            return
+        if isinstance(sample.value, tuple) and len(sample.value) > MAX_VALUES: # Never published as a partial tuple
+            self.__skipped += 1
+            return
+        pid_code = int(sample.pid.value, 16)
+        value_count, integer_mask, values = _pack_values(sample.value)
+        raw = sample.raw[:RAW_SIZE]
+
+        sequence = self.__published * 2 + 1 # Odd until the slot is complete, readers tell samples apart by it
+        self.__write_slot(self.__ring_offset + (self.__published % self.__capacity) * SLOT.size, sequence, sample.timestamp, pid_code, value_count, integer_mask, raw, values)
+        latest_sequence = self.__latest_sequences[pid_code] + 1
+        self.__write_slot(HEADER.size + pid_code * SLOT.size, latest_sequence, sample.timestamp, pid_code, value_count, integer_mask, raw, values)
+        self.__latest_sequences[pid_code] = latest_sequence + 1
+        self.__published += 1
+        SEQUENCE.pack_into(self.__buffer, HEADER.size - SEQUENCE.size, self.__published)
+
+    def __write_slot(self, offset: int, sequence: int, timestamp: float, pid_code: int, value_count: int, integer_mask: int, raw: bytes, values: tuple) -> None:
+        SEQUENCE.pack_into(self.__buffer, offset, sequence)
+        SLOT.pack_into(self.__buffer, offset, sequence, timestamp, pid_code, value_count, integer_mask, len(raw), raw, *values)
+        SEQUENCE.pack_into(self.__buffer, offset, sequence + 1)
+
+    def close(self) -> None:
+        # Readers that are still attached keep their mapping, the name is gone for new ones
+        self.__buffer = None
+        self.__memory.close()
+        self.__memory.unlink()
+        _created_names.discard(self.__memory.name)
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def published(self) -> int:
+        return self.__published
+
+    @property
+    def skipped(self) -> int:
+        return self.__skipped
+
+# ============================== # DpyOBDSampleBusReader # ============================== #
+
+class DpyOBDSampleBusReader():
+    def __init__(self, name: str, from_start: bool = False) -> None:
+        self.__memory = _attach(name)
+        self.__buffer = self.__memory.buf
+        magic, slot_size, latest_count, capacity, _, published = HEADER.unpack_from(self.__buffer, 0)
+        if magic != MAGIC or slot_size != SLOT.size or latest_count != LATEST_COUNT:
+            self.__memory.close()
+            raise ParserError(f"{name} is not a compatible sample bus")
+        self.__capacity = capacity
+        self.__ring_offset = HEADER.size + LATEST_COUNT * SLOT.size
+        self.__next = max(published - capacity, 0) if from_start else published # Number of the next sample to read
+        self.__dropped = 0
+
+    def latest(self, pid: DpyOBData.COMMANDS) -> Optional[DpyOBDSample]:
+        offset = HEADER.size + int(pid.value, 16) * SLOT.size
+        for _ in range(READ_RETRIES):
+            fields = SLOT.unpack_from(self.__buffer, offset)
+            if fields[0] == 0:
+                return None # Never published
+            if fields[0] % 2 == 0 and SEQUENCE.unpack_from(self.__buffer, offset)[0] == fields[0]:
+                return _unpack_sample(fields)
+            time.sleep(0) # The writer is in the middle of this slot
+        return None
+
+    def read(self, max_count: Optional[int] = None) -> List[DpyOBDSample]:
+        # Samples published since the last read, the ones that were overwritten before they were read are counted as dropped
+        published = SEQUENCE.unpack_from(self.__buffer, HEADER.size - SEQUENCE.size)[0]
+        if published - self.__next > self.__capacity:
+            self.__dropped += published - self.__capacity - self.__next
+            self.__next = published - self.__capacity
+        end = published if max_count is None else min(published, self.__next + max_count)
+        samples = list()
+        while self.__next < end:
+            offset = self.__ring_offset + (self.__next % self.__capacity) * SLOT.size
+            expected = self.__next * 2 + 2
+            fields = SLOT.unpack_from(self.__buffer, offset)
+            if fields[0] == expected and SEQUENCE.unpack_from(self.__buffer, offset)[0] == expected:
+                samples.append(_unpack_sample(fields))
+            else:
+                self.__dropped += 1 # The writer went around the ring while this slot was read
+            self.__next += 1
+        return samples
+
+    def close(self) -> None:
+        self.__buffer = None
+        self.__memory.close()
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    @property
+    def pending(self) -> int:
+        return SEQUENCE.unpack_from(self.__buffer, HEADER.size - SEQUENCE.size)[0] - self.__next
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Python before 3.13 tracks attached blocks too and would unlink the writer's block when a reader exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+        if memory.name not in _created_names: # The registration of a writer in this process is the same one and has to stay
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
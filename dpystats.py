@@ -0,0 +1,170 @@
+import math
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from dpyothers import DpyOBData
+
+PID_NAMES = {pid.value: pid.name for pid in DpyOBData.COMMANDS}
+
+# ============================== # DpyOBDHistogram # ============================== #
+
+class DpyOBDHistogram():
+    # Log scale buckets from 1 us on, so recording is O(1) and memory does not grow with the sample count
+    FIRST_BUCKET = 0.000001
+    BUCKETS_PER_DOUBLING = 4 # Percentiles are accurate to about 19%
+    BUCKET_COUNT = 108 # Last bucket holds everything above 110 s
+
+    def __init__(self) -> None:
+        self.__buckets = [0] * DpyOBDHistogram.BUCKET_COUNT
+        self.__count = 0
+        self.__total = 0.0
+        self.__minimum = None
+        self.__maximum = None
+
+    def record(self, value: float) -> None:
+        bucket = 0
+        if value > DpyOBDHistogram.FIRST_BUCKET:
+            bucket = min(math.ceil(math.log2(value / DpyOBDHistogram.FIRST_BUCKET) * DpyOBDHistogram.BUCKETS_PER_DOUBLING), DpyOBDHistogram.BUCKET_COUNT - 1)
+        self.__buckets[bucket] += 1
+        self.__count += 1
+        self.__total += value
+        if self.__minimum is None or value < self.__minimum:
+            self.__minimum = value
+        if self.__maximum is None or value > self.__maximum:
+            self.__maximum = value
+
+    def percentile(self, percent: float) -> Optional[float]:
+        # Upper limit of the bucket that holds the percentile, kept within the recorded values
+        if self.__count == 0:
+            return None
+        rank = self.__count * percent / 100
+        seen = 0
+        for bucket, bucket_count in enumerate(self.__buckets):
+            seen += bucket_count
+            if seen >= rank:
+                break
+        limit = DpyOBDHistogram.FIRST_BUCKET * 2 ** (bucket / DpyOBDHistogram.BUCKETS_PER_DOUBLING)
+        return max(self.__minimum, min(limit, self.__maximum))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.__count,
+            "mean": self.__total / self.__count if self.__count else None,
+            "min": self.__minimum,
+            "max": self.__maximum,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+# ============================== # DpyOBDStats # ============================== #
+
+class DpyOBDStats():
+    SMOOTHING = 0.2 # Weight of the newest sample interval in the achieved rates
+    PID_COUNTERS = ("samples", "timeouts", "no_data", "parse_errors", "filtered", "callback_dropped")
+
+    def __init__(self) -> None:
+        self.__hooks: List[Callable[[str, Optional[str], float], Any]] = list()
+        self.reset()
+
+    def reset(self) -> None:
+        self.__command_latency: Dict[str, DpyOBDHistogram] = dict()
+        self.__lock_wait = DpyOBDHistogram()
+        self.__callback_time: Dict[str, DpyOBDHistogram] = dict()
+        self.__pid_counters: Dict[str, Dict[str, int]] = dict()
+        self.__rates: Dict[str, List[Any]] = dict() # watcher -> [requested rate, last sample time, smoothed interval]
+
+    def add_hook(self, hook: Callable[[str, Optional[str], float], Any]) -> None:
+        # hook(metric, key, value) is called synchronously on every measurement, so it has to be cheap
+        self.__hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str, Optional[str], float], Any]) -> bool:
+        if hook in self.__hooks:
+            self.__hooks.remove(hook)
+            return True
+        return False
+
+    def record_command(self, command: str, latency: float) -> None:
+        key = self.__command_key(command)
+        histogram = self.__command_latency.get(key)
+        if histogram is None:
+            histogram = self.__command_latency[key] = DpyOBDHistogram()
+        histogram.record(latency)
+        self.__call_hooks("command_latency", key, latency)
+
+    def record_lock_wait(self, duration: float) -> None:
+        self.__lock_wait.record(duration)
+        self.__call_hooks("lock_wait", None, duration)
+
+    def record_timeout(self, command: str) -> None:
+        # Every pid of a timed out mode 01 request lost its sample
+        if command[:2] == "01" and len(command) >= 4:
+            for index in range(2, len(command) - 1, 2):
+                self.count_pid(command[index:index + 2], "timeouts")
+        self.__call_hooks("timeout", self.__command_key(command), 1)
+
+    def count_pid(self, pid: Hashable, counter: str) -> None:
+        key = self.__pid_key(pid)
+        counters = self.__pid_counters.get(key)
+        if counters is None:
+            counters = self.__pid_counters[key] = dict.fromkeys(DpyOBDStats.PID_COUNTERS, 0)
+        counters[counter] += 1
+        self.__call_hooks(counter, key, 1)
+
+    def watch_started(self, watcher: Hashable, rate: float) -> None:
+        self.__rates[self.__pid_key(watcher)] = [rate, None, None]
+
+    def watch_stopped(self, watcher: Hashable) -> None:
+        self.__rates.pop(self.__pid_key(watcher), None)
+
+    def record_sample(self, watcher: Hashable, now: float) -> None:
+        key = self.__pid_key(watcher)
+        rate = self.__rates.get(key)
+        if rate is not None:
+            if rate[1] is not None:
+                interval = now - rate[1]
+                rate[2] = interval if rate[2] is None else rate[2] + DpyOBDStats.SMOOTHING * (interval - rate[2])
+            rate[1] = now
+        if isinstance(watcher, DpyOBData.COMMANDS): # Built-in watchers only get a rate
+            self.count_pid(watcher, "samples")
+
+    def record_callback(self, watcher: Hashable, duration: float) -> None:
+        key = self.__pid_key(watcher)
+        histogram = self.__callback_time.get(key)
+        if histogram is None:
+            histogram = self.__callback_time[key] = DpyOBDHistogram()
+        histogram.record(duration)
+        self.__call_hooks("callback_time", key, duration)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "command_latency": {key: histogram.snapshot() for key, histogram in self.__command_latency.items()},
+            "lock_wait": self.__lock_wait.snapshot(),
+            "callback_time": {key: histogram.snapshot() for key, histogram in self.__callback_time.items()},
+            "pids": {key: dict(counters) for key, counters in self.__pid_counters.items()},
+            "rates": {key: {
+                "requested": rate[0],
+                "achieved": 1 / rate[2] if rate[2] else None,
+            } for key, rate in self.__rates.items()},
+        }
+
+    def __call_hooks(self, metric: str, key: Optional[str], value: float) -> None:
+        for hook in self.__hooks:
+            try:
+                hook(metric, key, value)
+            except Exception:
+                pass # A broken hook must not break the polling it observes
+
+    def __command_key(self, command: str) -> str:
+        # Multi pid requests are grouped by size, otherwise every pid combination would get its own histogram
+        if command[:2] == "01" and len(command) > 5:
+            return f"01 x{(len(command) - 2) // 2}"
+        return command
+
+    def __pid_key(self, pid: Hashable) -> str:
+        # Pids are reported by name, pid codes of raw commands are converted to the same names
+        if isinstance(pid, DpyOBData.COMMANDS):
+            return pid.name
+        return PID_NAMES.get(pid, pid)
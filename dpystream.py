@@ -0,0 +1,98 @@
+import asyncio
+from collections import deque
+from typing import Callable, FrozenSet, Iterable, List, Optional
+from dpyothers import DpyOBData, DpyOBDOverflow, DpyOBDSample
+
+class DpyOBDStream():
+    def __init__(self, pids: Iterable[DpyOBData.COMMANDS], max_size: int = 1024, overflow: DpyOBDOverflow = DpyOBDOverflow.DROP_OLDEST, on_close: Optional[Callable[["DpyOBDStream"], None]] = None) -> None:
+        if max_size <= 0:
+            raise ValueError("Stream size must be positive")
+        self.__pids = frozenset(pids)
+        self.__max_size = max_size
+        self.__overflow = overflow
+        self.__on_close = on_close
+        self.__queue = deque()
+        self.__ready = asyncio.Event()
+        self.__dropped = 0
+        self.__is_closed = False
+
+    def publish(self, sample: DpyOBDSample) -> None:
+        # Called from the poll loop, so it never waits for the consumer
+        if self.__is_closed:
+            return
+        if len(self.__queue) >= self.__max_size:
+            if self.__overflow == DpyOBDOverflow.DROP_OLDEST:
+                self.__queue.popleft()
+                self.__dropped += 1
+            else: # A full BLOCK stream only gets samples that other consumers of its pids asked for, it takes none of them
+                self.__dropped += 1
+                return
+        self.__queue.append(sample)
+        self.__ready.set()
+
+    async def __wait_for_samples(self) -> bool:
+        while not self.__queue:
+            if self.__is_closed:
+                return False
+            self.__ready.clear()
+            await self.__ready.wait()
+        return True
+
+    async def get_batch(self, max_count: Optional[int] = None) -> List[DpyOBDSample]:
+        # Waits for at least one sample and returns everything queued, an empty batch means the stream is closed
+        if not await self.__wait_for_samples():
+            return []
+        count = len(self.__queue) if max_count is None else min(max_count, len(self.__queue))
+        return [self.__queue.popleft() for _ in range(count)]
+
+    async def batches(self, max_count: Optional[int] = None):
+        while True:
+            batch = await self.get_batch(max_count)
+            if not batch:
+                return
+            yield batch
+
+    def close(self) -> None:
+        if self.__is_closed:
+            return
+        self.__is_closed = True
+        self.__ready.set()
+        if self.__on_close is not None:
+            self.__on_close(self)
+
+    def __aiter__(self) -> "DpyOBDStream":
+        return self
+
+    async def __anext__(self) -> DpyOBDSample:
+        if not await self.__wait_for_samples():
+            raise StopAsyncIteration
+        return self.__queue.popleft()
+
+    async def __aenter__(self) -> "DpyOBDStream":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def pids(self) -> FrozenSet[DpyOBData.COMMANDS]:
+        return self.__pids
+
+    @property
+    def overflow(self) -> DpyOBDOverflow:
+        return self.__overflow
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.__queue) >= self.__max_size
+
+    @property
+    def is_closed(self) -> bool:
+        return self.__is_closed
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    def __len__(self) -> int:
+        return len(self.__queue)
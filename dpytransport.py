@@ -0,0 +1,222 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import serial_asyncio
+from dpyothers import ConnectionError, ParserError
+
+# ============================== # DpyOBDTransport # ============================== #
+
+class DpyOBDTransport(ABC):
+    # Opens a (reader, writer) pair that behaves like the asyncio streams of a serial connection
+    @abstractmethod
+    async def open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+# ============================== # DpyOBDSerialTransport # ============================== #
+
+class DpyOBDSerialTransport(DpyOBDTransport):
+    def __init__(self, port: str, baudrate: int) -> None:
+        self.__port = port
+        self.__baudrate = baudrate
+
+    async def open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await serial_asyncio.open_serial_connection(url=self.__port, baudrate=self.__baudrate)
+
+    @property
+    def port(self) -> str:
+        return self.__port
+
+    @property
+    def baudrate(self) -> int:
+        return self.__baudrate
+
+    @property
+    def name(self) -> str:
+        return f"{self.__port} with {self.__baudrate} baudrate"
+
+# ============================== # DpyOBDEmulatorTransport # ============================== #
+
+class DpyOBDEmulatorTransport(DpyOBDTransport):
+    STARTUP_TIMEOUT = 5.0
+
+    def __init__(self, scenario: str = "car", delay: float = 0.0, baudrate: int = 38400) -> None:
+        self.__scenario = scenario
+        self.__delay = delay # Simulated ECU response time in seconds
+        self.__baudrate = baudrate
+        self.__emulator = None
+        self.__pty = None
+
+    async def open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        try:
+            from elm import Elm # ELM327-emulator is only needed for this transport
+        except ImportError:
+            raise ConnectionError("ELM327-emulator is required for the emulator transport")
+
+        loop = asyncio.get_running_loop()
+        self.__emulator = Elm(batch_mode=True)
+        self.__emulator.scenario = self.__scenario
+        self.__emulator.set_sorted_obd_msg()
+        self.__emulator.delay = self.__delay
+        self.__emulator.__enter__() # Starts the emulator thread which serves the pty
+
+        deadline = loop.time() + DpyOBDEmulatorTransport.STARTUP_TIMEOUT
+        # The emulator thread opens the pty itself, asking for it earlier would open a second one
+        while self.__emulator.threadState != self.__emulator.THREAD.ACTIVE:
+            if loop.time() > deadline or self.__emulator.threadState == self.__emulator.THREAD.TERMINATED:
+                await self.close()
+                raise ConnectionError("ELM327-emulator could not be started")
+            await asyncio.sleep(0.05)
+        self.__pty = self.__emulator.get_pty()
+        return await serial_asyncio.open_serial_connection(url=self.__pty, baudrate=self.__baudrate)
+
+    async def close(self) -> None:
+        if self.__emulator is not None:
+            emulator, self.__emulator = self.__emulator, None
+            await asyncio.get_running_loop().run_in_executor(None, emulator.terminate) # Joins the emulator thread
+
+    @property
+    def pty(self) -> Optional[str]:
+        return self.__pty
+
+    @property
+    def name(self) -> str:
+        return f"ELM327-emulator ({self.__scenario}) on {self.__pty}"
+
+# ============================== # DpyOBDReplayTransport # ============================== #
+
+class DpyOBDReplayTransport(DpyOBDTransport):
+    ELM_VERSION = "ELM327 v1.5"
+    PROTOCOL = "A6"
+    VOLTAGE = "12.0V"
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0) -> None:
+        # speed multiplies the recorded time, None answers every request with the next recorded sample
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.__path = path
+        self.__speed = speed
+        self.__samples: Dict[str, Tuple] = dict() # pid code -> (timestamps, raw payload bytes)
+        self.__cursors: Dict[str, int] = dict()
+        self.__supported_pids = set()
+        self.__first_timestamp = 0.0
+        self.__last_timestamp = 0.0
+        self.__replay_time = 0.0
+        self.__start_time = None
+        self.__reader = None
+
+    async def open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        from dpyrecorder import DpyOBDRecording
+
+        try:
+            recording = DpyOBDRecording(self.__path)
+        except ParserError as e:
+            raise ConnectionError(str(e))
+        columns = recording.query()
+        if not columns:
+            raise ConnectionError(f"Recording {self.__path} is empty")
+        self.__first_timestamp = min(float(records["timestamp"][0]) for records in columns.values())
+        self.__last_timestamp = max(float(records["timestamp"][-1]) for records in columns.values())
+        self.__replay_time = self.__first_timestamp
+        for pid, records in columns.items():
+            self.__samples[pid.value] = (records["timestamp"], records["raw"])
+            self.__cursors[pid.value] = 0
+            self.__supported_pids.add(int(pid.value, 16))
+        recording.close()
+
+        self.__start_time = asyncio.get_running_loop().time()
+        self.__reader = asyncio.StreamReader()
+        return self.__reader, DpyOBDReplayWriter(self)
+
+    def answer(self, command: str) -> None:
+        response = self.__response(command.strip().upper().replace(" ", "")) + "\r\r>"
+        # Answered on the next loop iteration like a real device, so that readers always yield to other tasks
+        asyncio.get_running_loop().call_soon(self.__reader.feed_data, response.encode())
+
+    def __response(self, command: str) -> str:
+        if command[:2] == "AT":
+            if command in ("ATZ", "ATI"):
+                return DpyOBDReplayTransport.ELM_VERSION
+            if command == "ATRV":
+                return DpyOBDReplayTransport.VOLTAGE
+            if command == "ATDPN":
+                return DpyOBDReplayTransport.PROTOCOL
+            return "OK"
+        if command[:2] != "01" or len(command) < 4:
+            return "NO DATA"
+
+        pid_codes = [command[i:i + 2] for i in range(2, len(command) - 1, 2)] # Odd length means a response count hint
+        response = "41"
+        for pid_code in pid_codes:
+            payload = self.__payload(pid_code)
+            if payload is not None:
+                response += pid_code + payload
+        return response if len(response) > 2 else "NO DATA"
+
+    def __payload(self, pid_code: str) -> Optional[str]:
+        base_pid = int(pid_code, 16)
+        if base_pid % 0x20 == 0: # Supported pids bitmap, built from the recorded pids
+            bitmap = sum(1 << (31 - i) for i in range(32) if base_pid + i + 1 in self.__supported_pids)
+            if any(pid > base_pid + 0x20 for pid in self.__supported_pids):
+                bitmap |= 1 # Next range is supported
+            return f"{bitmap:08X}" if bitmap or base_pid == 0 else None
+
+        samples = self.__samples.get(pid_code)
+        if samples is None:
+            return None
+        timestamps, payloads = samples
+        if self.__speed is None:
+            index = self.__cursors[pid_code]
+            if index >= len(payloads):
+                return None
+            self.__cursors[pid_code] = index + 1
+            self.__replay_time = max(self.__replay_time, float(timestamps[index]))
+        else:
+            index = int(timestamps.searchsorted(self.replay_time, side="right")) - 1
+            if index < 0:
+                return None
+        return payloads[index].tobytes().hex().upper()
+
+    @property
+    def replay_time(self) -> float:
+        if self.__speed is None:
+            return self.__replay_time
+        return self.__first_timestamp + (asyncio.get_running_loop().time() - self.__start_time) * self.__speed
+
+    @property
+    def is_finished(self) -> bool:
+        if self.__speed is None:
+            return all(self.__cursors[pid_code] >= len(samples[1]) for pid_code, samples in self.__samples.items())
+        return self.replay_time > self.__last_timestamp
+
+    @property
+    def name(self) -> str:
+        speed = "as fast as possible" if self.__speed is None else f"at {self.__speed}x"
+        return f"replay of {self.__path} {speed}"
+
+class DpyOBDReplayWriter():
+    def __init__(self, transport: DpyOBDReplayTransport) -> None:
+        self.__transport = transport
+        self.__buffer = ""
+
+    def write(self, data: bytes) -> None:
+        self.__buffer += data.decode(errors="ignore")
+        while "\r" in self.__buffer:
+            command, self.__buffer = self.__buffer.split("\r", 1)
+            self.__transport.answer(command)
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass